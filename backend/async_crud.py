@@ -0,0 +1,42 @@
+"""
+Async counterparts of the todo functions in crud.py (DATABASE_ASYNC=true).
+
+Each function runs the sync implementation through AsyncSession.run_sync, so
+the queries are identical while the database I/O goes through the async
+driver on the event loop instead of holding a threadpool worker.
+"""
+
+from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+import crud, schemas
+
+async def get_todos(db: AsyncSession, skip: int = 0, limit: int = 100, completed: Optional[bool] = None):
+    return await db.run_sync(crud.get_todos, skip=skip, limit=limit, completed=completed)
+
+async def get_todos_page(db: AsyncSession, limit: int = 100, cursor: Optional[str] = None,
+                         completed: Optional[bool] = None):
+    return await db.run_sync(crud.get_todos_page, limit=limit, cursor=cursor, completed=completed)
+
+async def current_version(db: AsyncSession) -> int:
+    return await db.run_sync(crud.current_version)
+
+async def get_todo_changes(db: AsyncSession, since: int) -> schemas.TodoChanges:
+    return await db.run_sync(crud.get_todo_changes, since)
+
+async def create_todo(db: AsyncSession, todo: schemas.TodoCreate):
+    return await db.run_sync(crud.create_todo, todo)
+
+async def update_todo(db: AsyncSession, todo_id: int, todo: schemas.TodoUpdate):
+    return await db.run_sync(crud.update_todo, todo_id, todo)
+
+async def delete_todo(db: AsyncSession, todo_id: int):
+    return await db.run_sync(crud.delete_todo, todo_id)
+
+async def reorder_todos(db: AsyncSession, todo_ids: List[int]):
+    return await db.run_sync(crud.reorder_todos, todo_ids)
+
+async def move_todo(db: AsyncSession, todo_id: int, before_id: Optional[int] = None, after_id: Optional[int] = None):
+    return await db.run_sync(crud.move_todo, todo_id, before_id=before_id, after_id=after_id)
+
+async def apply_todo_batch(db: AsyncSession, operations: List[schemas.TodoBatchOperation]):
+    return await db.run_sync(crud.apply_todo_batch, operations)
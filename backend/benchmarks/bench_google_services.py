@@ -0,0 +1,54 @@
+"""
+Benchmark: per-request cost of building Google API service objects.
+
+Compares calling googleapiclient.discovery.build() on every request (the old
+behaviour) with the per-credential service pool in services.google_clients. No
+network access is needed: only service construction is measured.
+
+Run from the backend directory: python benchmarks/bench_google_services.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from services.google_clients import borrow_service
+
+ITERATIONS = 50
+
+
+def _creds() -> Credentials:
+    return Credentials(
+        token="benchmark-token",
+        refresh_token="benchmark-refresh",
+        client_id="benchmark-client",
+        client_secret="benchmark-secret",
+        token_uri="https://oauth2.googleapis.com/token",
+    )
+
+
+def _borrow(api: str, version: str) -> None:
+    with borrow_service(api, version, _creds()):
+        pass
+
+
+def _time_per_call(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    for api, version in [("calendar", "v3"), ("gmail", "v1")]:
+        # Each request used to load fresh credentials and build a new service
+        uncached = _time_per_call(lambda: build(api, version, credentials=_creds(), cache_discovery=False))
+        cached = _time_per_call(lambda: _borrow(api, version))
+        print(f"{api:>8}: build() per request {uncached:8.3f} ms | cached {cached:8.4f} ms | {uncached / cached:,.0f}x faster")
+
+
+if __name__ == "__main__":
+    main()
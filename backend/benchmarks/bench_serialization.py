@@ -0,0 +1,110 @@
+"""
+Benchmark: encoding large widget payloads to JSON.
+
+Compares FastAPI's default response path (jsonable_encoder + json.dumps), the
+precompiled TypeAdapters in serializers.py, and orjson over the dumped dicts
+(ORJSONResponse) for 1,000-item lists, and reports the payload size raw, gzip
+and (when the brotli package is installed) brotli.
+
+Run from the backend directory: python benchmarks/bench_serialization.py
+"""
+import gzip
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+import schemas
+import serializers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ITEMS = 1_000
+ITERATIONS = 50
+
+
+def _github_prs():
+    return [
+        schemas.GithubPR(
+            title=f"Fix flaky test in module {i}", url=f"https://github.com/org/repo{i % 20}/pull/{i}",
+            repo=f"org/repo{i % 20}", author=f"user{i % 50}", created_at="2026-10-01T12:00:00Z",
+            state="open", labels=[schemas.GithubLabel(name="bug", color="d73a4a")],
+            mergeable=True, mergeable_state="clean", review_decision="REVIEW_REQUIRED",
+        )
+        for i in range(ITEMS)
+    ]
+
+
+def _jira_issues():
+    return [
+        schemas.JiraIssue(
+            key=f"PROJ-{i}", summary=f"Investigate slow dashboard load #{i}", status="In Progress",
+            priority="Medium", assignee="Jane Doe", url=f"https://example.atlassian.net/browse/PROJ-{i}",
+        )
+        for i in range(ITEMS)
+    ]
+
+
+def _calendar_events():
+    return [
+        schemas.CalendarEvent(
+            summary=f"Meeting {i}", start_time="2026-10-17T09:00:00+02:00", end_time="2026-10-17T09:30:00+02:00",
+            location="Room 4" if i % 2 else None, html_link=f"https://calendar.google.com/event?eid={i}",
+        )
+        for i in range(ITEMS)
+    ]
+
+
+def _todos():
+    return [
+        schemas.Todo(id=i, title=f"Todo item {i}", completed=i % 3 == 0, order=i, rank=None, version=i)
+        for i in range(ITEMS)
+    ]
+
+
+PAYLOADS = [
+    ("github prs", serializers.github_prs, _github_prs),
+    ("jira issues", serializers.jira_issues, _jira_issues),
+    ("calendar events", serializers.calendar_events, _calendar_events),
+    ("todos", serializers.todos, _todos),
+]
+
+
+def _time_ms(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def _default(value) -> bytes:
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def main():
+    print(f"{ITEMS:,} items per payload, {ITERATIONS} iterations")
+    for name, adapter, build in PAYLOADS:
+        value = build()
+        default_ms = _time_ms(lambda: _default(value))
+        adapter_ms = _time_ms(lambda: adapter.dump_json(value))
+        orjson_ms = _time_ms(lambda: orjson.dumps(adapter.dump_python(value)))
+        body = adapter.dump_json(value)
+        sizes = f"raw {len(body):,} B | gzip {len(gzip.compress(body)):,} B"
+        if brotli is not None:
+            sizes += f" | brotli {len(brotli.compress(body)):,} B"
+        print(
+            f"{name:<16} default {default_ms:6.2f} ms | TypeAdapter {adapter_ms:6.2f} ms"
+            f" | orjson {orjson_ms:6.2f} ms | {sizes}"
+        )
+
+
+if __name__ == "__main__":
+    main()
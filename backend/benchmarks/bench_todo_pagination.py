@@ -0,0 +1,64 @@
+"""
+Benchmark: latency of todo list pages at increasing depth.
+
+Compares offset paging (crud.get_todos with skip) with keyset paging
+(crud.get_todos_page with a cursor) over a large table. Uses DATABASE_URL when
+set (point it at a scratch database: the todos table is emptied), otherwise a
+temporary SQLite file.
+
+Run from the backend directory: python benchmarks/bench_todo_pagination.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_pagination.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, insert
+import crud, models
+from database import Base, SessionLocal, engine
+
+TODOS = 100_000
+PAGE_SIZE = 100
+DEPTHS = [0, 1_000, 10_000, 50_000, 99_000]
+ITERATIONS = 20
+
+
+def _seed():
+    with SessionLocal() as db:
+        db.execute(delete(models.Todo))
+        db.execute(insert(models.Todo), [
+            {"title": f"Todo {i}", "completed": i % 3 == 0, "order": i} for i in range(TODOS)
+        ])
+        db.commit()
+
+
+def _time_ms(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    _seed()
+    print(f"database: {engine.dialect.name}, {TODOS:,} todos, {PAGE_SIZE} per page")
+    with SessionLocal() as db:
+        for depth in DEPTHS:
+            # Cursor pointing just before the page at this depth
+            cursor = None
+            if depth:
+                previous = crud.get_todos(db, skip=depth - 1, limit=1)[0]
+                cursor = crud.encode_cursor(previous)
+            offset_ms = _time_ms(lambda: crud.get_todos(db, skip=depth, limit=PAGE_SIZE))
+            keyset_ms = _time_ms(lambda: crud.get_todos_page(db, limit=PAGE_SIZE, cursor=cursor))
+            print(f"page at {depth:>6}: offset {offset_ms:7.2f} ms | keyset {keyset_ms:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
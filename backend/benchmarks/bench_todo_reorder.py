@@ -0,0 +1,87 @@
+"""
+Benchmark: reordering N todos.
+
+Compares the old reorder (one SELECT per id, then a full re-read of the list)
+with crud.reorder_todos (one set-based UPDATE ... RETURNING). Uses DATABASE_URL
+when set (point it at a scratch database: the todos table is emptied),
+otherwise a temporary SQLite file.
+
+Run from the backend directory: python benchmarks/bench_todo_reorder.py
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_reorder.db')}"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, event, insert
+import crud, models
+from database import Base, SessionLocal, engine
+
+SIZES = [100, 1000, 10000]
+ITERATIONS = 3
+
+_statements = 0
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _count_statement(*args):
+    global _statements
+    _statements += 1
+
+
+def _legacy_reorder(db, todo_ids):
+    """The per-id reorder this benchmark compares against."""
+    for index, todo_id in enumerate(todo_ids):
+        db_todo = db.query(models.Todo).filter(models.Todo.id == todo_id).first()
+        if db_todo:
+            db_todo.order = index
+    db.commit()
+    return db.query(models.Todo).order_by(models.Todo.order).limit(len(todo_ids)).all()
+
+
+def _seed(size):
+    with SessionLocal() as db:
+        db.execute(delete(models.Todo))
+        db.execute(insert(models.Todo), [
+            {"title": f"Todo {i}", "completed": False, "order": i} for i in range(size)
+        ])
+        db.commit()
+        return [todo_id for (todo_id,) in db.query(models.Todo.id).all()]
+
+
+def _measure(fn, ids):
+    global _statements
+    total = 0.0
+    statements = 0
+    for _ in range(ITERATIONS):
+        random.shuffle(ids)
+        with SessionLocal() as db:
+            _statements = 0
+            start = time.perf_counter()
+            fn(db, ids)
+            total += time.perf_counter() - start
+            statements = _statements
+    return total / ITERATIONS * 1000, statements
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    print(f"database: {engine.dialect.name}")
+    for size in SIZES:
+        ids = _seed(size)
+        legacy_ms, legacy_statements = _measure(_legacy_reorder, ids)
+        bulk_ms, bulk_statements = _measure(crud.reorder_todos, ids)
+        print(
+            f"{size:>6} todos: per-id {legacy_ms:9.1f} ms ({legacy_statements} statements) | "
+            f"bulk {bulk_ms:8.1f} ms ({bulk_statements} statements) | {legacy_ms / bulk_ms:5.1f}x faster"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,48 +1,526 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List
+from sqlalchemy import Integer, bindparam, case, column, delete, event, func, insert, not_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import base64
+import json
+import os
 import models, schemas
+from ranking import evenly_spaced_ranks, rank_between
 
-def get_todos(db: Session, skip: int = 0, limit: int = 100):
-    """Get todos ordered by order field."""
-    return db.query(models.Todo).order_by(models.Todo.order).offset(skip).limit(limit).all()
+# "position" (dense integer order, reorders rewrite rows) or "rank" (sortable
+# rank keys, moving a todo rewrites only that row)
+TODO_ORDERING = os.getenv("TODO_ORDERING", "position").strip('"\'').lower()
+# Rebalance rank keys once any grows longer than this
+TODO_RANK_MAX_LENGTH = int(os.getenv("TODO_RANK_MAX_LENGTH", "12"))
 
-def create_todo(db: Session, todo: schemas.TodoCreate):
-    """Create a new todo with order set to max+1."""
-    max_order = db.query(func.max(models.Todo.order)).scalar() or 0
-    db_todo = models.Todo(
-        title=todo.title,
-        completed=todo.completed,
-        order=max_order + 1
+# Ids per statement wherever ids are bound one by one (rank lookups, and the CASE
+# update on backends other than PostgreSQL, which joins on unnest); keeps the bind
+# parameter count (up to 3 per id) below SQLite's 32766 limit
+REORDER_CASE_CHUNK = 5000
+
+_TODO_COLUMNS = (
+    models.Todo.id, models.Todo.title, models.Todo.completed, models.Todo.order, models.Todo.rank,
+    models.Todo.version,
+)
+
+class TodoConflict(Exception):
+    """The todo changed since the version the client based its update on."""
+
+    def __init__(self, todo_id: int, version: Optional[int]):
+        super().__init__(f"Todo {todo_id} has changed (now at version {version})")
+        self.version = version
+
+def _transaction_version(db: Session) -> int:
+    """Version stamped on every todo written in the current transaction.
+
+    Incrementing the counter row locks it until commit, so write transactions
+    take versions in commit order. Repeated calls within one transaction
+    return the same version.
+    """
+    version = db.info.get("todo_version")
+    if version is not None:
+        return version
+    counter = models.TodoVersionCounter
+    statement = update(counter).where(counter.id == 1).values(version=counter.version + 1)
+    if db.get_bind().dialect.update_returning:
+        version = db.execute(statement.returning(counter.version)).scalar()
+    else:
+        version = db.scalar(select(counter.version).where(counter.id == 1)) if db.execute(statement).rowcount else None
+    if version is None:
+        db.add(counter(id=1, version=1))
+        db.flush()
+        version = 1
+    db.info["todo_version"] = version
+    return version
+
+_change_listeners: List[Callable[[int], None]] = []
+
+def add_change_listener(listener: Callable[[int], None]) -> None:
+    """Call ``listener(version)`` after every committed transaction that wrote todos."""
+    _change_listeners.append(listener)
+
+@event.listens_for(Session, "after_commit")
+def _notify_todos_changed(session):
+    version = session.info.get("todo_version")
+    if version is None:
+        return
+    for listener in _change_listeners:
+        try:
+            listener(version)
+        except Exception as e:
+            print(f"Todo change listener failed: {e}")
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_transaction_version(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("todo_version", None)
+
+def current_version(db: Session) -> int:
+    return db.scalar(select(models.TodoVersionCounter.version).where(models.TodoVersionCounter.id == 1)) or 0
+
+def init_todo_versions(db: Session) -> None:
+    """Create the version counter and stamp todos written before versions existed."""
+    if db.query(models.Todo.id).filter(models.Todo.version.is_(None)).first() is None \
+            and db.get(models.TodoVersionCounter, 1) is not None:
+        return
+    version = _transaction_version(db)
+    db.execute(update(models.Todo).where(models.Todo.version.is_(None)).values(version=version))
+    db.commit()
+
+def _record_tombstones(db: Session, todo_ids: List[int], version: int) -> None:
+    if not todo_ids:
+        return
+    # Ids can be reused (e.g. SQLite), so replace any older tombstone
+    db.execute(delete(models.TodoTombstone).where(models.TodoTombstone.todo_id.in_(todo_ids)))
+    db.execute(insert(models.TodoTombstone), [{"todo_id": todo_id, "version": version} for todo_id in todo_ids])
+
+def get_todo_changes(db: Session, since: int) -> schemas.TodoChanges:
+    """Todos written and deleted after version ``since``.
+
+    The counter is read first: everything up to that version is committed, so
+    a client passing it back as ``since`` never misses a change (it may see a
+    newer one twice).
+    """
+    version = current_version(db)
+    todos = db.execute(
+        select(*_TODO_COLUMNS).where(models.Todo.version > since).order_by(*_ordering())
+    ).all()
+    deleted = db.scalars(
+        select(models.TodoTombstone.todo_id)
+        .where(models.TodoTombstone.version > since)
+        # A reused id is a live todo again
+        .where(~select(models.Todo.id).where(models.Todo.id == models.TodoTombstone.todo_id).exists())
+    ).all()
+    return schemas.TodoChanges(
+        version=version,
+        todos=[schemas.Todo.model_validate(todo) for todo in todos],
+        deleted=list(deleted),
     )
+
+def _ordering():
+    if TODO_ORDERING == "rank":
+        return (models.Todo.rank, models.Todo.id)
+    return (models.Todo.order, models.Todo.id)
+
+def _todos_query(db: Session, completed: Optional[bool] = None):
+    query = db.query(models.Todo)
+    if completed is not None:
+        query = query.filter(models.Todo.completed == completed)
+    return query.order_by(*_ordering())
+
+def get_todos(db: Session, skip: int = 0, limit: int = 100, completed: Optional[bool] = None):
+    """Get todos in list order (order field, or rank key with TODO_ORDERING=rank)."""
+    return _todos_query(db, completed).offset(skip).limit(limit).all()
+
+def encode_cursor(todo) -> str:
+    """Opaque cursor pointing just after ``todo`` in the current list order."""
+    sort_key = todo.rank if TODO_ORDERING == "rank" else todo.order
+    payload = json.dumps([TODO_ORDERING, sort_key, todo.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Any, int]:
+    """Return the (sort key, id) a cursor points after; raises ValueError if it is invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ordering, sort_key, todo_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if ordering != TODO_ORDERING:
+        raise ValueError("Cursor was issued for a different todo ordering")
+    return sort_key, todo_id
+
+def get_todos_page(db: Session, limit: int = 100, cursor: Optional[str] = None,
+                   completed: Optional[bool] = None):
+    """Get one page of todos after ``cursor`` and the cursor for the next page (None at the end).
+
+    Keyset pagination: the page starts with an index seek on (order, id) /
+    (rank, id) rather than skipping rows, so every page costs the same.
+    """
+    query = _todos_query(db, completed)
+    if cursor is not None:
+        sort_key, todo_id = decode_cursor(cursor)
+        query = query.filter(tuple_(*_ordering()) > tuple_(sort_key, todo_id))
+    # One extra row tells whether there is a next page
+    todos = query.limit(limit + 1).all()
+    if len(todos) <= limit:
+        return todos, None
+    todos = todos[:limit]
+    return todos, encode_cursor(todos[-1])
+
+def _shorten_ranks_before_append(db: Session) -> None:
+    """Rebalance first if the last rank key has grown to TODO_RANK_MAX_LENGTH (commits).
+
+    Call before the transaction writes anything: appends lengthen the last key,
+    and waiting for the background rebalancer would let keys grow meanwhile.
+    """
+    last_rank = db.query(func.max(models.Todo.rank)).scalar()
+    if last_rank is not None and len(last_rank) >= TODO_RANK_MAX_LENGTH:
+        rebalance_ranks(db)
+
+def create_todo(db: Session, todo: schemas.TodoCreate):
+    """Create a new todo at the end of the list (order max+1, or a rank after the last one)."""
+    if TODO_ORDERING == "rank":
+        _shorten_ranks_before_append(db)
+    db_todo = models.Todo(title=todo.title, completed=todo.completed, version=_transaction_version(db))
+    if TODO_ORDERING == "rank":
+        # max() of an indexed column is a single index lookup
+        last_rank = db.query(func.max(models.Todo.rank)).scalar()
+        db_todo.rank = rank_between(last_rank, None)
+    else:
+        max_order = db.query(func.max(models.Todo.order)).scalar() or 0
+        db_todo.order = max_order + 1
     db.add(db_todo)
     db.commit()
     db.refresh(db_todo)
     return db_todo
 
-def update_todo(db: Session, todo_id: int, todo: schemas.TodoCreate):
-    """Update a todo's title and completed status."""
+def update_todo(db: Session, todo_id: int, todo: schemas.TodoUpdate):
+    """Update a todo's title and completed status.
+
+    If ``todo.version`` is set and the todo has been written since, raises
+    TodoConflict without changing anything.
+    """
+    version = _transaction_version(db)
     db_todo = db.query(models.Todo).filter(models.Todo.id == todo_id).first()
-    if db_todo:
-        db_todo.title = todo.title
-        db_todo.completed = todo.completed
-        db.commit()
-        db.refresh(db_todo)
+    if db_todo is None:
+        db.rollback()
+        return None
+    if todo.version is not None and db_todo.version != todo.version:
+        current = db_todo.version
+        db.rollback()
+        raise TodoConflict(todo_id, current)
+    db_todo.title = todo.title
+    db_todo.completed = todo.completed
+    db_todo.version = version
+    db.commit()
+    db.refresh(db_todo)
     return db_todo
 
 def delete_todo(db: Session, todo_id: int):
-    """Delete a todo."""
+    """Delete a todo, leaving a tombstone for delta clients."""
     db_todo = db.query(models.Todo).filter(models.Todo.id == todo_id).first()
     if db_todo:
         db.delete(db_todo)
+        _record_tombstones(db, [todo_id], _transaction_version(db))
         db.commit()
     return db_todo
 
+def _bulk_set(db: Session, field: str, new_values: Dict[int, Any]):
+    """Set ``field`` per todo id in one set-based UPDATE and return the updated rows.
+
+    Uses a join on ``unnest(ids, values)`` on PostgreSQL (two array parameters
+    however many ids, so asyncpg's 32767 bind limit is never reached) and a
+    chunked CASE expression elsewhere. Rows come
+    back from RETURNING rather than a second read. Plain rows rather than ORM
+    objects: they don't expire on commit, so serializing them doesn't reload
+    each todo. The caller commits.
+    """
+    if not new_values:
+        return []
+
+    target = getattr(models.Todo, field)
+    version = _transaction_version(db)
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql":
+        new_value = func.unnest(
+            bindparam("ids", list(new_values), type_=ARRAY(Integer)),
+            bindparam("new_values", list(new_values.values()), type_=ARRAY(target.type)),
+        ).table_valued(column("id", Integer), column("value", target.type)).alias("new_value")
+        statements = [
+            update(models.Todo)
+            .where(models.Todo.id == new_value.c.id)
+            .values({target: new_value.c.value, models.Todo.version: version})
+        ]
+    else:
+        ids = list(new_values)
+        statements = []
+        for start in range(0, len(ids), REORDER_CASE_CHUNK):
+            chunk = ids[start:start + REORDER_CASE_CHUNK]
+            statements.append(
+                update(models.Todo)
+                .where(models.Todo.id.in_(chunk))
+                .values({
+                    target: case({todo_id: new_values[todo_id] for todo_id in chunk}, value=models.Todo.id),
+                    models.Todo.version: version,
+                })
+            )
+
+    if dialect.update_returning:
+        todos = []
+        for statement in statements:
+            todos.extend(db.execute(
+                statement.returning(*_TODO_COLUMNS),
+                execution_options={"synchronize_session": False},
+            ).all())
+    else:
+        for statement in statements:
+            db.execute(statement, execution_options={"synchronize_session": False})
+        todos = db.execute(select(*_TODO_COLUMNS).where(models.Todo.id.in_(list(new_values)))).all()
+    return todos
+
 def reorder_todos(db: Session, todo_ids: List[int]):
-    """Reorder todos based on the provided list of IDs."""
-    for index, todo_id in enumerate(todo_ids):
-        db_todo = db.query(models.Todo).filter(models.Todo.id == todo_id).first()
-        if db_todo:
-            db_todo.order = index
+    """Reorder todos based on the provided list of IDs.
+
+    Sets every position in one set-based UPDATE (see ``_bulk_set``) and returns
+    the reordered todos in their new order. With TODO_ORDERING=rank the listed
+    todos swap the rank keys they already hold instead, so todos left out of
+    the list keep their place. Unknown ids are ignored; ids must not repeat
+    (the routers reject duplicates).
+    """
+    positions = {todo_id: index for index, todo_id in enumerate(todo_ids)}
+    if TODO_ORDERING == "rank":
+        ranks = _current_ranks(db, todo_ids)
+        if None in ranks.values() or len(set(ranks.values())) < len(ranks):
+            # Listed todos without a key of their own can't be told apart; spread all keys out first
+            rebalance_ranks(db)
+            ranks = _current_ranks(db, todo_ids)
+        listed = [todo_id for todo_id in todo_ids if todo_id in ranks]
+        todos = _bulk_set(db, "rank", dict(zip(listed, sorted(ranks.values()))))
+        db.commit()
+        return sorted(todos, key=lambda todo: (todo.rank, todo.id))
+    todos = _bulk_set(db, "order", positions)
     db.commit()
-    return get_todos(db)
+    return sorted(todos, key=lambda todo: (todo.order, todo.id))
+
+def _current_ranks(db: Session, todo_ids: List[int]) -> Dict[int, Optional[str]]:
+    """Rank key of each existing todo in ``todo_ids``."""
+    ranks = {}
+    for start in range(0, len(todo_ids), REORDER_CASE_CHUNK):
+        chunk = todo_ids[start:start + REORDER_CASE_CHUNK]
+        ranks.update(db.execute(select(models.Todo.id, models.Todo.rank).where(models.Todo.id.in_(chunk))).all())
+    return ranks
+
+def _get_rank(db: Session, todo_id: int) -> Optional[str]:
+    row = db.query(models.Todo.rank).filter(models.Todo.id == todo_id).first()
+    if row is None:
+        raise ValueError(f"Todo {todo_id} not found")
+    return row.rank
+
+def _neighbour_ranks(db: Session, todo_id: int, before_id: Optional[int], after_id: Optional[int]):
+    """Ranks the moved todo must sort between, looking up the missing neighbour by index."""
+    others = db.query(models.Todo.rank).filter(models.Todo.id != todo_id)
+    if after_id is not None:
+        lower = _get_rank(db, after_id)
+        if before_id is not None:
+            upper = _get_rank(db, before_id)
+        else:
+            upper = others.filter(models.Todo.rank > lower).with_entities(func.min(models.Todo.rank)).scalar()
+    elif before_id is not None:
+        upper = _get_rank(db, before_id)
+        lower = others.filter(models.Todo.rank < upper).with_entities(func.max(models.Todo.rank)).scalar()
+    else:
+        lower = others.with_entities(func.max(models.Todo.rank)).scalar()
+        upper = None
+    return lower, upper
+
+def move_todo(db: Session, todo_id: int, before_id: Optional[int] = None, after_id: Optional[int] = None):
+    """Move a todo directly after ``after_id`` and/or before ``before_id`` (neither: to the end).
+
+    With TODO_ORDERING=rank only the moved row is written. Returns None if the
+    todo doesn't exist; raises ValueError for an invalid neighbour.
+    """
+    if todo_id in (before_id, after_id):
+        raise ValueError("A todo cannot be moved relative to itself")
+    db_todo = db.query(models.Todo).filter(models.Todo.id == todo_id).first()
+    if db_todo is None:
+        return None
+
+    if TODO_ORDERING != "rank":
+        ids = [row.id for row in db.query(models.Todo.id).order_by(*_ordering()) if row.id != todo_id]
+        if after_id is not None:
+            if after_id not in ids:
+                raise ValueError(f"Todo {after_id} not found")
+            index = ids.index(after_id) + 1
+        elif before_id is not None:
+            if before_id not in ids:
+                raise ValueError(f"Todo {before_id} not found")
+            index = ids.index(before_id)
+        else:
+            index = len(ids)
+        ids.insert(index, todo_id)
+        todos = reorder_todos(db, ids)
+        return next(todo for todo in todos if todo.id == todo_id)
+
+    lower, upper = _neighbour_ranks(db, todo_id, before_id, after_id)
+    if lower is not None and lower == upper:
+        # Neighbours share a rank (e.g. concurrent appends); spread all keys out first
+        rebalance_ranks(db)
+        lower, upper = _neighbour_ranks(db, todo_id, before_id, after_id)
+    if lower is not None and upper is not None and lower >= upper:
+        raise ValueError("'after' must come before 'before' in the list")
+    db_todo.rank = rank_between(lower, upper)
+    db_todo.version = _transaction_version(db)
+    db.commit()
+    db.refresh(db_todo)
+    return db_todo
+
+def ranks_need_rebalance(db: Session) -> bool:
+    """Whether any rank key is missing or has grown past TODO_RANK_MAX_LENGTH."""
+    missing = db.query(models.Todo.id).filter(models.Todo.rank.is_(None)).first() is not None
+    longest = db.query(func.max(func.length(models.Todo.rank))).scalar() or 0
+    return missing or longest > TODO_RANK_MAX_LENGTH
+
+def rebalance_ranks(db: Session) -> int:
+    """Give every todo a short evenly spaced rank key, keeping the current order.
+
+    Todos without a rank (created under TODO_ORDERING=position) go after the
+    ranked ones, in ``order`` order. Returns the number of todos rewritten.
+    """
+    ids = [row.id for row in db.query(models.Todo.id).order_by(
+        models.Todo.rank.is_(None), models.Todo.rank, models.Todo.order, models.Todo.id
+    )]
+    ranks = evenly_spaced_ranks(len(ids))
+    _bulk_set(db, "rank", dict(zip(ids, ranks)))
+    db.commit()
+    return len(ids)
+
+def _next_positions(db: Session, count: int) -> List[Dict[str, Any]]:
+    """Order/rank values for ``count`` todos appended to the end of the list."""
+    if TODO_ORDERING == "rank":
+        rank = db.query(func.max(models.Todo.rank)).scalar()
+        positions = []
+        for _ in range(count):
+            rank = rank_between(rank, None)
+            positions.append({"rank": rank})
+        return positions
+    max_order = db.query(func.max(models.Todo.order)).scalar() or 0
+    return [{"order": max_order + 1 + index} for index in range(count)]
+
+def apply_todo_batch(db: Session, operations: List[schemas.TodoBatchOperation]) -> List[schemas.TodoBatchResult]:
+    """Apply create/update/delete/toggle operations in one transaction.
+
+    Each kind of operation runs as one set-based statement (updates: one per
+    changed field) with RETURNING, so the batch costs a handful of statements
+    whatever its size. Results are returned in request order; operations on
+    unknown todos fail individually without affecting the rest. Raises
+    ValueError for an invalid batch (missing or repeated ids), before
+    anything is written.
+    """
+    seen = set()
+    for operation in operations:
+        if operation.op == "create":
+            if operation.title is None:
+                raise ValueError("create operations need a title")
+            continue
+        if operation.id is None:
+            raise ValueError(f"{operation.op} operations need an id")
+        if operation.id in seen:
+            raise ValueError(f"Todo {operation.id} appears in more than one operation")
+        seen.add(operation.id)
+
+    by_op: Dict[str, List[schemas.TodoBatchOperation]] = {}
+    for operation in operations:
+        by_op.setdefault(operation.op, []).append(operation)
+    if TODO_ORDERING == "rank" and "create" in by_op:
+        _shorten_ranks_before_append(db)
+    dialect = db.get_bind().dialect
+
+    try:
+        rows: Dict[int, Any] = {}
+
+        updates = by_op.get("update", [])
+        for field in ("title", "completed"):
+            # Later statements return the row with every earlier change applied
+            new_values = {op.id: getattr(op, field) for op in updates if getattr(op, field) is not None}
+            rows.update((row.id, row) for row in _bulk_set(db, field, new_values))
+        # Updates that set nothing still report the todo
+        unchanged = [op.id for op in updates if op.id not in rows]
+        if unchanged:
+            rows.update((row.id, row) for row in db.execute(
+                select(*_TODO_COLUMNS).where(models.Todo.id.in_(unchanged))
+            ))
+
+        toggle_ids = [op.id for op in by_op.get("toggle", [])]
+        if toggle_ids:
+            statement = (
+                update(models.Todo)
+                .where(models.Todo.id.in_(toggle_ids))
+                .values(completed=not_(models.Todo.completed), version=_transaction_version(db))
+            )
+            if dialect.update_returning:
+                toggled = db.execute(statement.returning(*_TODO_COLUMNS),
+                                     execution_options={"synchronize_session": False})
+            else:
+                db.execute(statement, execution_options={"synchronize_session": False})
+                toggled = db.execute(select(*_TODO_COLUMNS).where(models.Todo.id.in_(toggle_ids)))
+            rows.update((row.id, row) for row in toggled)
+
+        delete_ids = [op.id for op in by_op.get("delete", [])]
+        deleted = set()
+        if delete_ids:
+            statement = delete(models.Todo).where(models.Todo.id.in_(delete_ids))
+            if dialect.delete_returning:
+                deleted = set(db.scalars(statement.returning(models.Todo.id),
+                                         execution_options={"synchronize_session": False}))
+            else:
+                deleted = set(db.scalars(select(models.Todo.id).where(models.Todo.id.in_(delete_ids))))
+                db.execute(statement, execution_options={"synchronize_session": False})
+            _record_tombstones(db, sorted(deleted), _transaction_version(db))
+
+        creates = by_op.get("create", [])
+        created = []
+        if creates:
+            new_rows = [
+                {"title": op.title, "completed": bool(op.completed), "version": _transaction_version(db), **position}
+                for op, position in zip(creates, _next_positions(db, len(creates)))
+            ]
+            if dialect.insert_executemany_returning_sort_by_parameter_order:
+                created = db.execute(
+                    insert(models.Todo).returning(*_TODO_COLUMNS, sort_by_parameter_order=True), new_rows
+                ).all()
+            else:
+                db_todos = [models.Todo(**values) for values in new_rows]
+                db.add_all(db_todos)
+                db.flush()
+                created = [schemas.Todo.model_validate(todo) for todo in db_todos]
+                db.expunge_all()
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    created_rows = iter(created)
+    results = []
+    for operation in operations:
+        if operation.op == "create":
+            todo = schemas.Todo.model_validate(next(created_rows))
+            results.append(schemas.TodoBatchResult(op="create", id=todo.id, ok=True, todo=todo))
+        elif operation.op == "delete":
+            ok = operation.id in deleted
+            results.append(schemas.TodoBatchResult(
+                op="delete", id=operation.id, ok=ok, error=None if ok else "Todo not found"
+            ))
+        else:
+            row = rows.get(operation.id)
+            if row is None:
+                results.append(schemas.TodoBatchResult(
+                    op=operation.op, id=operation.id, ok=False, error="Todo not found"
+                ))
+            else:
+                results.append(schemas.TodoBatchResult(
+                    op=operation.op, id=operation.id, ok=True,
+                    todo=schemas.Todo.model_validate(row)
+                ))
+    return results
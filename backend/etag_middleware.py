@@ -0,0 +1,93 @@
+"""
+Conditional GET support for the JSON API.
+
+Pure ASGI middleware that gives every successful ``GET /api/v1/...`` response a
+weak ETag computed from its body and answers a matching ``If-None-Match``
+with ``304 Not Modified`` and no body, so an unchanged widget costs a header
+exchange instead of the full payload. The tag is weak because it is computed
+before GZipMiddleware: the gzip and identity encodings share it, so it vouches
+for the JSON content rather than the bytes on the wire.
+
+Responses are sent with ``Cache-Control: private, no-cache``: the browser may
+store them but must revalidate every time. A cheap 304 is enough to avoid the
+payload, and a refetch triggered by an SSE change event must never be answered
+with the body that event just replaced. Streaming responses
+(``text/event-stream``) pass through untouched.
+"""
+
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def make_etag(body: bytes) -> str:
+    return 'W/"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+
+class ETagMiddleware:
+    def __init__(self, app: ASGIApp, prefix: str = "/api/v1"):
+        self.app = app
+        self.prefix = prefix
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message = {}
+        body_parts = []
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] != 200
+                    or "etag" in headers
+                    or headers.get("content-type", "").startswith("text/event-stream")
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                # Hold the start until the whole body is known
+                start_message = message
+                return
+
+            if message["type"] == "http.response.body":
+                body_parts.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                await self._send_with_etag(scope, start_message, b"".join(body_parts), send)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_with_etag(self, scope: Scope, start_message: Message, body: bytes, send: Send) -> None:
+        headers = MutableHeaders(raw=start_message["headers"])
+        etag = make_etag(body)
+        headers["ETag"] = etag
+        headers.setdefault("Cache-Control", "private, no-cache")
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, etag):
+            del headers["content-length"]
+            del headers["content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
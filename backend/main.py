@@ -1,18 +1,36 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-import models
-from database import engine
-from routers import todos, github, jira, calendar, gmail, google_auth
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+import crud, metrics, models
+from etag_middleware import ETagMiddleware
+from database import engine, add_missing_columns, async_engine, DATABASE_ASYNC, SessionLocal
+from routers import todos, todos_async, github, jira, calendar, gmail, google_auth, dashboard, events
 from services.mock_data import is_demo_mode
+from services import event_stream, http_client, rank_rebalancer
+from services.refresh_scheduler import scheduler
+import os
 import time
 from sqlalchemy.exc import OperationalError
 
+# Responses smaller than this many bytes are sent uncompressed
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1000"))
+
+# Time every database statement for /metrics
+metrics.instrument_engine(engine)
+if async_engine is not None:
+    metrics.instrument_engine(async_engine.sync_engine)
+
 # Retry logic for DB connection
 def create_tables():
     retries = 5
     while retries > 0:
         try:
             models.Base.metadata.create_all(bind=engine)
+            add_missing_columns(engine)
+            with SessionLocal() as db:
+                crud.init_todo_versions(db)
             print("Database tables created successfully")
             break
         except OperationalError:
@@ -22,7 +40,32 @@ def create_tables():
 
 create_tables()
 
-app = FastAPI(title="AIN Dashboard API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Push widget changes to connected dashboards
+    event_stream.start()
+    # Keep upstream widget data warm in the background (not needed for mock data)
+    if not is_demo_mode():
+        scheduler.start()
+        if crud.TODO_ORDERING == "rank":
+            rank_rebalancer.start()
+    yield
+    rank_rebalancer.stop()
+    await scheduler.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+    # Release pooled upstream connections
+    http_client.close_session()
+
+# orjson encodes responses of routes that don't return a precompiled serializer's output
+app = FastAPI(title="AIN Dashboard API", lifespan=lifespan, default_response_class=ORJSONResponse)
+
+# Conditional GET (ETag / If-None-Match) for API responses; added first so
+# CORS stays the outer layer and its headers also go out on 304s
+app.add_middleware(ETagMiddleware)
+# Compress larger payloads (outside ETag, which hashes the uncompressed body;
+# event streams are never compressed)
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE)
 
 # Configure CORS
 app.add_middleware(
@@ -31,14 +74,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Todos-Version"],
 )
 
-app.include_router(todos.router)
+# Route latency histograms; outermost so the time includes every other middleware
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Todos run on the async engine when enabled (tables are still created through the sync engine)
+app.include_router(todos_async.router if DATABASE_ASYNC else todos.router)
 app.include_router(github.router)
 app.include_router(jira.router)
 app.include_router(calendar.router)
 app.include_router(gmail.router)
 app.include_router(google_auth.router)
+app.include_router(dashboard.router)
+app.include_router(events.router)
 
 @app.get("/")
 def read_root():
@@ -48,6 +98,11 @@ def read_root():
 def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get("/api/v1/demo-mode")
 def get_demo_mode_status():
     """Check if demo mode is enabled."""
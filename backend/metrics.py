@@ -0,0 +1,268 @@
+"""
+Prometheus metrics, served in the text exposition format at ``GET /metrics``.
+
+A small in-process registry (counters, gauges, histograms with labels) rather
+than the prometheus_client package: the app runs as a single process, so
+nothing beyond thread-safe counters is needed. Values that other modules
+already track (cache stats, scheduler state) are registered as callbacks and
+read at scrape time instead of being copied on every change.
+
+Recorded here:
+- route latency (``MetricsMiddleware``, labelled by route template)
+- upstream call latency and errors (http_client for GitHub/Jira, google_clients
+  for Calendar/Gmail)
+- database statement timings (``instrument_engine``)
+"""
+
+import bisect
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Latency buckets (seconds) for HTTP routes and upstream calls
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Finer buckets for database statements
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, last is +Inf), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """A counter or gauge whose samples are read from ``collect()`` at scrape time."""
+
+    def __init__(self, name: str, documentation: str, kind: str, collect: Callable[[], Iterable[Sample]]):
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = []
+        for labels, value in self.collect():
+            names = sorted(labels)
+            lines.append(f"{self.name}{_format_labels(names, [labels[n] for n in names])} {_format_value(value)}")
+        return lines
+
+
+_registry: List[_Metric] = []
+
+
+def _register(metric: _Metric) -> _Metric:
+    _registry.append(metric)
+    return metric
+
+
+def register_callback(name: str, documentation: str, kind: str, collect: Callable[[], Iterable[Sample]]) -> None:
+    """Expose values owned by another module; ``collect`` yields ``(labels, value)`` pairs."""
+    _register(CallbackMetric(name, documentation, kind, collect))
+
+
+def render() -> str:
+    """All metrics in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        try:
+            samples = metric.render()
+        except Exception as e:
+            print(f"Metrics: collecting {metric.name} failed: {e}")
+            continue
+        lines.extend(metric.header())
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+http_request_duration = _register(Histogram(
+    "http_request_duration_seconds", "Time to serve an API request, by route template.",
+    ("method", "route", "status"),
+))
+upstream_request_duration = _register(Histogram(
+    "upstream_request_duration_seconds", "Latency of calls to upstream APIs (GitHub, Jira, Google).",
+    ("upstream",),
+))
+upstream_errors = _register(Counter(
+    "upstream_errors_total", "Upstream calls that failed (HTTP status >= 400 or an exception).",
+    ("upstream", "reason"),
+))
+db_query_duration = _register(Histogram(
+    "db_query_duration_seconds", "Database statement execution time, by statement type.",
+    ("operation",), buckets=DB_BUCKETS,
+))
+
+
+def observe_upstream(upstream: str, seconds: float, status: Optional[int] = None,
+                     error: Optional[BaseException] = None) -> None:
+    """Record one upstream call; ``status`` is the HTTP status, ``error`` the exception it raised."""
+    upstream_request_duration.observe(seconds, upstream=upstream)
+    if error is not None:
+        upstream_errors.inc(upstream=upstream, reason=error.__class__.__name__)
+    elif status is not None and status >= 400:
+        upstream_errors.inc(upstream=upstream, reason=str(status))
+
+
+def _route_label(scope: Scope) -> str:
+    route = scope.get("route")
+    # Unmatched paths (404s, scanners) share one label to keep cardinality bounded
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """Times every HTTP request until its last body chunk; event streams are not timed."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+        streaming = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, streaming
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                streaming = content_type.startswith("text/event-stream")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not streaming:
+                http_request_duration.observe(
+                    time.perf_counter() - start,
+                    method=scope["method"], route=_route_label(scope), status=str(status),
+                )
+
+
+_OPERATION = re.compile(r"\s*(\w+)")
+
+
+def _operation(statement: str) -> str:
+    match = _OPERATION.match(statement)
+    return match.group(1).upper() if match else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement executed on ``engine`` (for an AsyncEngine pass ``.sync_engine``)."""
+
+    # The start time lives on the statement's execution context, so a statement
+    # that raises (no after_cursor_execute) leaves nothing behind on the connection
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.metrics_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "metrics_query_start", None)
+        if start is not None:
+            db_query_duration.observe(time.perf_counter() - start, operation=_operation(statement))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean
+from sqlalchemy import BigInteger, Column, Integer, String, Boolean, Float, Index, UniqueConstraint
 from database import Base
 
 class Todo(Base):
@@ -8,3 +8,63 @@ class Todo(Base):
     title = Column(String, index=True)
     completed = Column(Boolean, default=False)
     order = Column(Integer, default=0)
+    # Sortable key used instead of ``order`` when TODO_ORDERING=rank (see ranking.py);
+    # keys compare byte-wise, so PostgreSQL must not sort them by a locale collation
+    rank = Column(String().with_variant(String(collation="C"), "postgresql"))
+    # Version of the transaction that last wrote this todo (see TodoVersionCounter)
+    version = Column(BigInteger, index=True)
+
+    # Keyset pagination walks (order, id) / (rank, id), optionally within one
+    # completed state; on PostgreSQL the page columns are included so pages
+    # are served by index-only scans
+    __table_args__ = (
+        Index("ix_todos_order_id", "order", "id", postgresql_include=["title", "completed"]),
+        Index("ix_todos_rank_id", "rank", "id", postgresql_include=["title", "completed", "order"]),
+        Index("ix_todos_completed_order_id", "completed", "order", "id", postgresql_include=["title"]),
+        Index("ix_todos_completed_rank_id", "completed", "rank", "id", postgresql_include=["title", "order"]),
+    )
+
+class TodoVersionCounter(Base):
+    """Single row holding the latest todo version.
+
+    Every write transaction increments it once and stamps the todos it writes
+    with the new value; the row lock held until commit makes versions visible
+    in commit order, so ``version > since`` never skips a change.
+    """
+    __tablename__ = "todo_version_counter"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=0)
+
+class TodoTombstone(Base):
+    """Deleted todo, kept so delta clients (``?since=``) learn about the delete."""
+    __tablename__ = "todo_tombstones"
+
+    todo_id = Column(Integer, primary_key=True)
+    version = Column(BigInteger, nullable=False, index=True)
+
+class JiraIssueRecord(Base):
+    """Local copy of a Jira issue matching the task filter, kept current by incremental sync."""
+    __tablename__ = "jira_issues"
+    __table_args__ = (UniqueConstraint("domain", "key", name="uq_jira_issue_domain_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    domain = Column(String, index=True)
+    key = Column(String)
+    summary = Column(String)
+    status = Column(String)
+    priority = Column(String)
+    priority_rank = Column(Integer)
+    assignee = Column(String)
+    url = Column(String)
+    updated = Column(Float)  # POSIX timestamp of the issue's "updated" field
+
+class JiraSyncState(Base):
+    """Per-domain sync bookkeeping for the Jira issue store."""
+    __tablename__ = "jira_sync_state"
+
+    domain = Column(String, primary_key=True)
+    filter_hash = Column(String)  # JQL filter the store was built with; a change forces a full sync
+    account_id = Column(String)  # accountId of the API user, to detect reassigned issues
+    last_sync = Column(Float)  # POSIX start time of the last successful sync
+    last_full_sync = Column(Float)
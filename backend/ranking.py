@@ -0,0 +1,71 @@
+"""
+Sortable rank keys for todo ordering (TODO_ORDERING=rank).
+
+A rank is a base-36 string compared lexicographically; a new key can always be
+generated between two neighbours, so moving a todo rewrites only that todo's
+row. Keys never end in "0", which guarantees there is room below every key.
+Keys grow by about one character per repeated insert at the same spot, and
+appends step the first digit that can still go up (one character per ~17
+appends), so they are rebalanced to short evenly spaced keys once too long.
+"""
+
+from typing import List, Optional
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+
+def _digit(key: str, index: int, default: int) -> int:
+    return DIGITS.index(key[index]) if index < len(key) else default
+
+
+def _rank_after(before: str) -> str:
+    """Shortest key above ``before`` that increments one of its digits."""
+    for index, char in enumerate(before):
+        if char != DIGITS[-1]:
+            return before[:index] + DIGITS[DIGITS.index(char) + 1]
+    # All "z": only a longer key sorts higher
+    return before + DIGITS[BASE // 2]
+
+
+def rank_between(before: Optional[str], after: Optional[str]) -> str:
+    """Return a key sorting strictly between ``before`` and ``after`` (None = open end)."""
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"rank {before!r} does not sort before {after!r}")
+    if before is not None and after is None:
+        # Appending: a fixed step keeps keys short where halving towards "z" would not
+        return _rank_after(before)
+
+    lower = before or ""
+    upper = after
+    key = []
+    index = 0
+    while True:
+        low = _digit(lower, index, 0)
+        high = _digit(upper, index, BASE) if upper is not None else BASE
+        if high - low > 1:
+            key.append(DIGITS[(low + high) // 2])
+            return "".join(key)
+        key.append(DIGITS[low])
+        if high - low == 1:
+            # The prefix is now below ``after``, so any longer key stays below it
+            upper = None
+        index += 1
+
+
+def evenly_spaced_ranks(count: int) -> List[str]:
+    """``count`` ascending keys of minimal fixed width, spread evenly over the key space."""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    step = BASE ** width / (count + 1)
+    ranks = []
+    for position in range(1, count + 1):
+        value = int(position * step)
+        digits = []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        # Trailing zeros carry no ordering information
+        ranks.append("".join(reversed(digits)).rstrip("0"))
+    return ranks
@@ -1,7 +1,11 @@
-from fastapi import APIRouter
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
 from typing import List
-import schemas
+import schemas, serializers
 from services import calendar_service
+from services.refresh_scheduler import scheduler
 from services.mock_data import is_demo_mode, get_mock_calendar_events
 
 router = APIRouter(
@@ -9,8 +13,39 @@ router = APIRouter(
     tags=["calendar"],
 )
 
+# Longest range served by /range (a month view with leading/trailing weeks)
+MAX_RANGE_DAYS = 42
+
 @router.get("/events", response_model=List[schemas.CalendarEvent])
-def get_events():
+async def get_events(refresh: bool = False):
     if is_demo_mode():
         return get_mock_calendar_events()
-    return calendar_service.get_todays_events()
+    entry = await scheduler.get("calendar_events", force_refresh=refresh)
+    return serializers.json_response(serializers.calendar_events, entry.value or [], entry.freshness_headers())
+
+@router.get("/range", response_model=List[schemas.CalendarDay])
+async def get_events_range(start: date, end: date, tz: str = "UTC"):
+    """Events per day from start to end (inclusive) in timezone tz, for week and month views."""
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {tz}")
+
+    if is_demo_mode():
+        today = datetime.now().date().isoformat()
+        return [
+            schemas.CalendarDay(
+                date=(start + timedelta(days=i)).isoformat(),
+                events=get_mock_calendar_events() if (start + timedelta(days=i)).isoformat() == today else []
+            )
+            for i in range((end - start).days + 1)
+        ]
+    try:
+        days = await run_in_threadpool(calendar_service.get_events_range, start, end, tz)
+    except calendar_service.CalendarUnavailable as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    return serializers.json_response(serializers.calendar_days, days)
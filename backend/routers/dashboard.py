@@ -0,0 +1,125 @@
+import asyncio
+import time
+from typing import Any, Dict, Tuple
+from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
+import async_crud, crud, schemas
+from database import AsyncSessionLocal, DATABASE_ASYNC, SessionLocal
+from services.refresh_scheduler import scheduler, SourceEntry
+from services.mock_data import (
+    is_demo_mode,
+    get_mock_todos,
+    get_mock_github_prs,
+    get_mock_my_prs,
+    get_mock_jira_tasks,
+    get_mock_calendar_events,
+    get_mock_gmail_unread_count,
+)
+
+router = APIRouter(
+    prefix="/api/v1/dashboard",
+    tags=["dashboard"],
+)
+
+
+def _fetch_todos():
+    """Read todos with a session owned by the worker thread (sessions are not thread-safe)."""
+    db = SessionLocal()
+    try:
+        return crud.get_todos(db)
+    finally:
+        db.close()
+
+
+async def _fetch_todos_async():
+    async with AsyncSessionLocal() as db:
+        return await async_crud.get_todos(db)
+
+
+async def _run_todos() -> Tuple[Any, schemas.DashboardSourceStatus]:
+    """Read todos (async engine, or the threadpool) and time it, capturing any error."""
+    start = time.perf_counter()
+    try:
+        if DATABASE_ASYNC:
+            result = await _fetch_todos_async()
+        else:
+            result = await run_in_threadpool(_fetch_todos)
+        status = schemas.DashboardSourceStatus(
+            status="ok",
+            duration_ms=round((time.perf_counter() - start) * 1000, 1),
+        )
+        return result, status
+    except Exception as e:
+        print(f"Dashboard: todos failed: {e}")
+        status = schemas.DashboardSourceStatus(
+            status="error",
+            duration_ms=round((time.perf_counter() - start) * 1000, 1),
+            error=str(e),
+        )
+        return None, status
+
+
+def _entry_status(entry: SourceEntry) -> schemas.DashboardSourceStatus:
+    """Map a scheduler entry to ok / stale (serving an older value after a failure) / error."""
+    if not entry.has_value:
+        status = "error"
+    elif entry.last_error:
+        status = "stale"
+    else:
+        status = "ok"
+    return schemas.DashboardSourceStatus(
+        status=status,
+        duration_ms=entry.last_duration_ms,
+        error=entry.last_error,
+        age_seconds=entry.age_seconds,
+        refresh_interval=entry.interval,
+    )
+
+
+def _demo_dashboard() -> schemas.Dashboard:
+    demo_status = schemas.DashboardSourceStatus(status="ok", duration_ms=0)
+    return schemas.Dashboard(
+        github_prs=get_mock_github_prs(),
+        my_prs=get_mock_my_prs(),
+        jira_tasks=get_mock_jira_tasks(),
+        calendar_events=get_mock_calendar_events(),
+        gmail_unread=schemas.GmailUnreadCount(count=get_mock_gmail_unread_count()),
+        gmail_counts=schemas.GmailLabelCounts(counts={
+            "INBOX": schemas.GmailLabelCount(unread=get_mock_gmail_unread_count(), total=1240),
+        }),
+        todos=[schemas.Todo(**todo) for todo in get_mock_todos()],
+        sources={name: demo_status for name in scheduler.names + ["todos"]},
+    )
+
+
+@router.get("", response_model=schemas.Dashboard)
+async def get_dashboard(refresh: bool = False):
+    """Return every widget source in one combined payload.
+
+    Upstream sources are served from the background refresh cache; any that
+    have no value yet (or all of them, with ``refresh=true``) are fetched
+    concurrently, so page load costs as much as the slowest source.
+    A failing source is reported in ``sources`` and leaves its field empty.
+    """
+    if is_demo_mode():
+        return _demo_dashboard()
+
+    names = scheduler.names
+    entries, (todos, todos_status) = await asyncio.gather(
+        asyncio.gather(*(scheduler.get(name, force_refresh=refresh) for name in names)),
+        _run_todos(),
+    )
+
+    payload: Dict[str, Any] = {"sources": {"todos": todos_status}}
+    if todos is not None:
+        payload["todos"] = todos
+    for name, entry in zip(names, entries):
+        payload["sources"][name] = _entry_status(entry)
+        if entry.has_value:
+            payload[name] = entry.value
+
+    if "gmail_unread" in payload:
+        payload["gmail_unread"] = schemas.GmailUnreadCount(count=payload["gmail_unread"])
+    if "gmail_counts" in payload:
+        payload["gmail_counts"] = schemas.GmailLabelCounts(counts=payload["gmail_counts"])
+    return payload
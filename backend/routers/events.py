@@ -0,0 +1,30 @@
+from typing import Optional
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+from services import event_stream
+
+router = APIRouter(
+    prefix="/api/v1/events",
+    tags=["events"],
+)
+
+@router.get("")
+async def stream_events(
+    last_event_id: Optional[str] = Header(None),
+    last_id: Optional[str] = None,
+):
+    """Server-Sent Events stream of widget updates.
+
+    Each event is named after the source that changed (``github_prs``,
+    ``my_prs``, ``jira_tasks``, ``calendar_events``, ``gmail_unread``,
+    ``gmail_counts``, ``todos``); clients refetch that widget. A heartbeat
+    comment is sent every SSE_HEARTBEAT_INTERVAL seconds. Reconnecting
+    clients resume from ``Last-Event-ID`` (or ``?last_id=``); a ``resync``
+    event means events were missed (or the id is from before a backend
+    restart) and every widget should be refetched.
+    """
+    return StreamingResponse(
+        event_stream.stream(last_event_id or last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 from typing import List
-import schemas
-from services import github_service
+import schemas, serializers
+from services.github_rate_limit import limiter
+from services.refresh_scheduler import scheduler
 from services.mock_data import is_demo_mode, get_mock_github_prs, get_mock_my_prs
 
 router = APIRouter(
@@ -10,13 +11,20 @@ router = APIRouter(
 )
 
 @router.get("/prs", response_model=List[schemas.GithubPR])
-def get_prs():
+async def get_prs(refresh: bool = False):
     if is_demo_mode():
         return get_mock_github_prs()
-    return github_service.get_review_requested_prs()
+    entry = await scheduler.get("github_prs", force_refresh=refresh)
+    return serializers.json_response(serializers.github_prs, entry.value or [], entry.freshness_headers())
 
 @router.get("/my-prs", response_model=List[schemas.GithubPR])
-def get_my_prs():
+async def get_my_prs(refresh: bool = False):
     if is_demo_mode():
         return get_mock_my_prs()
-    return github_service.get_my_prs()
+    entry = await scheduler.get("my_prs", force_refresh=refresh)
+    return serializers.json_response(serializers.github_prs, entry.value or [], entry.freshness_headers())
+
+@router.get("/rate-limit", response_model=List[schemas.GithubRateLimit])
+def get_rate_limit():
+    """Per-resource GitHub budget and how many calls were delayed, deferred or throttled."""
+    return limiter.snapshot()
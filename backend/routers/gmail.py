@@ -1,15 +1,38 @@
-from fastapi import APIRouter
-from schemas import GmailUnreadCount
+from fastapi import APIRouter, Response
+from typing import List
+from schemas import GmailArrival, GmailLabelCount, GmailLabelCounts, GmailUnreadCount
 from services import gmail_service
+from services.refresh_scheduler import scheduler
 from services.mock_data import is_demo_mode, get_mock_gmail_unread_count
 
 router = APIRouter(prefix="/api/v1/gmail", tags=["gmail"])
 
 
 @router.get("/unread", response_model=GmailUnreadCount)
-def get_unread_count():
+async def get_unread_count(response: Response, refresh: bool = False):
     """Get the count of unread emails in inbox."""
     if is_demo_mode():
         return GmailUnreadCount(count=get_mock_gmail_unread_count())
-    count = gmail_service.get_unread_count()
-    return GmailUnreadCount(count=count)
+    entry = await scheduler.get("gmail_unread", force_refresh=refresh)
+    response.headers.update(entry.freshness_headers())
+    return GmailUnreadCount(count=entry.value or 0)
+
+
+@router.get("/counts", response_model=GmailLabelCounts)
+async def get_label_counts(response: Response, refresh: bool = False):
+    """Unread/total counts for each configured label or search query."""
+    if is_demo_mode():
+        return GmailLabelCounts(counts={
+            "INBOX": GmailLabelCount(unread=get_mock_gmail_unread_count(), total=1240),
+        })
+    entry = await scheduler.get("gmail_counts", force_refresh=refresh)
+    response.headers.update(entry.freshness_headers())
+    return GmailLabelCounts(counts=entry.value or {})
+
+
+@router.get("/arrivals", response_model=List[GmailArrival])
+async def get_recent_arrivals():
+    """Recent unread inbox arrivals seen by history polling (newest first)."""
+    if is_demo_mode():
+        return []
+    return gmail_service.get_recent_arrivals()
@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from typing import List
-import schemas
-from services import jira_service
+import schemas, serializers
+from services.refresh_scheduler import scheduler
 from services.mock_data import is_demo_mode, get_mock_jira_tasks
 
 router = APIRouter(
@@ -10,7 +10,8 @@ router = APIRouter(
 )
 
 @router.get("/tasks", response_model=List[schemas.JiraIssue])
-async def read_jira_tasks():
+async def read_jira_tasks(refresh: bool = False):
     if is_demo_mode():
         return get_mock_jira_tasks()
-    return jira_service.get_my_tasks()
+    entry = await scheduler.get("jira_tasks", force_refresh=refresh)
+    return serializers.json_response(serializers.jira_issues, entry.value or [], entry.freshness_headers())
@@ -1,7 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
-import crud, models, schemas
+from typing import List, Optional, Union
+import crud, models, schemas, serializers
 from database import get_db
 from services.mock_data import is_demo_mode, get_mock_todos
 
@@ -11,12 +11,43 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
-@router.get("/", response_model=List[schemas.Todo])
-def read_todos(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/", response_model=Union[List[schemas.Todo], schemas.TodoChanges])
+def read_todos(
+    skip: int = 0,
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    since: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_db),
+):
+    """List todos in order, one page at a time.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the
+    next page; the header is absent on the last page. ``skip`` (offset
+    paging) is still accepted but gets slower for deep pages.
+
+    ``X-Todos-Version`` carries the current version; pass it back as
+    ``since`` to get only the todos written and deleted after it
+    (a ``TodoChanges`` object instead of a list).
+    """
     if is_demo_mode():
-        return [schemas.Todo(**todo) for todo in get_mock_todos()]
-    todos = crud.get_todos(db, skip=skip, limit=limit)
-    return todos
+        if since is not None:
+            return schemas.TodoChanges(version=0)
+        return [schemas.Todo(**todo) for todo in get_mock_todos()
+                if completed is None or todo["completed"] == completed]
+    if since is not None:
+        return crud.get_todo_changes(db, since=since)
+    headers = {"X-Todos-Version": str(crud.current_version(db))}
+    if skip and cursor is None:
+        todos = crud.get_todos(db, skip=skip, limit=limit, completed=completed)
+        return serializers.todos_response(todos, headers)
+    try:
+        todos, next_cursor = crud.get_todos_page(db, limit=limit, cursor=cursor, completed=completed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return serializers.todos_response(todos, headers)
 
 @router.post("/", response_model=schemas.Todo)
 def create_todo(todo: schemas.TodoCreate, db: Session = Depends(get_db)):
@@ -25,11 +56,31 @@ def create_todo(todo: schemas.TodoCreate, db: Session = Depends(get_db)):
         return schemas.Todo(id=999, title=todo.title, completed=todo.completed, order=99)
     return crud.create_todo(db=db, todo=todo)
 
+@router.post("/batch", response_model=List[schemas.TodoBatchResult])
+def apply_batch(batch: schemas.TodoBatch, db: Session = Depends(get_db)):
+    """Apply many create/update/delete/toggle operations in one transaction.
+
+    Returns one result per operation, in request order. The whole batch is
+    rejected (400) if an id is missing or used by more than one operation.
+    """
+    if is_demo_mode():
+        return [
+            schemas.TodoBatchResult(op=operation.op, id=operation.id or 999, ok=True)
+            for operation in batch.operations
+        ]
+    try:
+        return crud.apply_todo_batch(db, batch.operations)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.put("/{todo_id}", response_model=schemas.Todo)
-def update_todo(todo_id: int, todo: schemas.TodoCreate, db: Session = Depends(get_db)):
+def update_todo(todo_id: int, todo: schemas.TodoUpdate, db: Session = Depends(get_db)):
     if is_demo_mode():
         return schemas.Todo(id=todo_id, title=todo.title, completed=todo.completed, order=0)
-    db_todo = crud.update_todo(db, todo_id=todo_id, todo=todo)
+    try:
+        db_todo = crud.update_todo(db, todo_id=todo_id, todo=todo)
+    except crud.TodoConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if db_todo is None:
         raise HTTPException(status_code=404, detail="Todo not found")
     return db_todo
@@ -44,6 +95,24 @@ def delete_todo(todo_id: int, db: Session = Depends(get_db)):
 @router.post("/reorder", response_model=List[schemas.Todo])
 def reorder_todos(reorder: schemas.TodoReorder, db: Session = Depends(get_db)):
     """Reorder todos based on the provided list of IDs."""
+    if len(set(reorder.order)) != len(reorder.order):
+        raise HTTPException(status_code=400, detail="Duplicate todo ids in order")
     if is_demo_mode():
         return [schemas.Todo(**todo) for todo in get_mock_todos()]
     return crud.reorder_todos(db, todo_ids=reorder.order)
+
+@router.post("/{todo_id}/move", response_model=schemas.Todo)
+def move_todo(todo_id: int, move: schemas.TodoMove, db: Session = Depends(get_db)):
+    """Move one todo next to another (only that todo is written with TODO_ORDERING=rank)."""
+    if is_demo_mode():
+        todo = next((todo for todo in get_mock_todos() if todo["id"] == todo_id), None)
+        if todo is None:
+            raise HTTPException(status_code=404, detail="Todo not found")
+        return schemas.Todo(**todo)
+    try:
+        db_todo = crud.move_todo(db, todo_id=todo_id, before_id=move.before, after_id=move.after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if db_todo is None:
+        raise HTTPException(status_code=404, detail="Todo not found")
+    return db_todo
@@ -0,0 +1,124 @@
+"""
+Async version of routers/todos.py, used when DATABASE_ASYNC=true.
+
+Same routes and behaviour; database calls go through async_crud on the event
+loop instead of occupying threadpool workers needed by upstream calls.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Union
+import async_crud, crud, schemas, serializers
+from database import get_async_db
+from services.mock_data import is_demo_mode, get_mock_todos
+
+router = APIRouter(
+    prefix="/api/v1/todos",
+    tags=["todos"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/", response_model=Union[List[schemas.Todo], schemas.TodoChanges])
+async def read_todos(
+    skip: int = 0,
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = None,
+    completed: Optional[bool] = None,
+    since: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """List todos in order, one page at a time.
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to get the
+    next page; the header is absent on the last page. ``skip`` (offset
+    paging) is still accepted but gets slower for deep pages.
+
+    ``X-Todos-Version`` carries the current version; pass it back as
+    ``since`` to get only the todos written and deleted after it
+    (a ``TodoChanges`` object instead of a list).
+    """
+    if is_demo_mode():
+        if since is not None:
+            return schemas.TodoChanges(version=0)
+        return [schemas.Todo(**todo) for todo in get_mock_todos()
+                if completed is None or todo["completed"] == completed]
+    if since is not None:
+        return await async_crud.get_todo_changes(db, since=since)
+    headers = {"X-Todos-Version": str(await async_crud.current_version(db))}
+    if skip and cursor is None:
+        todos = await async_crud.get_todos(db, skip=skip, limit=limit, completed=completed)
+        return serializers.todos_response(todos, headers)
+    try:
+        todos, next_cursor = await async_crud.get_todos_page(db, limit=limit, cursor=cursor, completed=completed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    return serializers.todos_response(todos, headers)
+
+@router.post("/", response_model=schemas.Todo)
+async def create_todo(todo: schemas.TodoCreate, db: AsyncSession = Depends(get_async_db)):
+    if is_demo_mode():
+        # In demo mode, return a fake created todo (won't persist)
+        return schemas.Todo(id=999, title=todo.title, completed=todo.completed, order=99)
+    return await async_crud.create_todo(db=db, todo=todo)
+
+@router.post("/batch", response_model=List[schemas.TodoBatchResult])
+async def apply_batch(batch: schemas.TodoBatch, db: AsyncSession = Depends(get_async_db)):
+    """Apply many create/update/delete/toggle operations in one transaction.
+
+    Returns one result per operation, in request order. The whole batch is
+    rejected (400) if an id is missing or used by more than one operation.
+    """
+    if is_demo_mode():
+        return [
+            schemas.TodoBatchResult(op=operation.op, id=operation.id or 999, ok=True)
+            for operation in batch.operations
+        ]
+    try:
+        return await async_crud.apply_todo_batch(db, batch.operations)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/{todo_id}", response_model=schemas.Todo)
+async def update_todo(todo_id: int, todo: schemas.TodoUpdate, db: AsyncSession = Depends(get_async_db)):
+    if is_demo_mode():
+        return schemas.Todo(id=todo_id, title=todo.title, completed=todo.completed, order=0)
+    try:
+        db_todo = await async_crud.update_todo(db, todo_id=todo_id, todo=todo)
+    except crud.TodoConflict as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if db_todo is None:
+        raise HTTPException(status_code=404, detail="Todo not found")
+    return db_todo
+
+@router.delete("/{todo_id}")
+async def delete_todo(todo_id: int, db: AsyncSession = Depends(get_async_db)):
+    if is_demo_mode():
+        return {"ok": True}
+    await async_crud.delete_todo(db, todo_id=todo_id)
+    return {"ok": True}
+
+@router.post("/reorder", response_model=List[schemas.Todo])
+async def reorder_todos(reorder: schemas.TodoReorder, db: AsyncSession = Depends(get_async_db)):
+    """Reorder todos based on the provided list of IDs."""
+    if len(set(reorder.order)) != len(reorder.order):
+        raise HTTPException(status_code=400, detail="Duplicate todo ids in order")
+    if is_demo_mode():
+        return [schemas.Todo(**todo) for todo in get_mock_todos()]
+    return await async_crud.reorder_todos(db, todo_ids=reorder.order)
+
+@router.post("/{todo_id}/move", response_model=schemas.Todo)
+async def move_todo(todo_id: int, move: schemas.TodoMove, db: AsyncSession = Depends(get_async_db)):
+    """Move one todo next to another (only that todo is written with TODO_ORDERING=rank)."""
+    if is_demo_mode():
+        todo = next((todo for todo in get_mock_todos() if todo["id"] == todo_id), None)
+        if todo is None:
+            raise HTTPException(status_code=404, detail="Todo not found")
+        return schemas.Todo(**todo)
+    try:
+        db_todo = await async_crud.move_todo(db, todo_id=todo_id, before_id=move.before, after_id=move.after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if db_todo is None:
+        raise HTTPException(status_code=404, detail="Todo not found")
+    return db_todo
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import List
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, List, Literal
 
 class TodoBase(BaseModel):
     title: str
@@ -11,14 +11,47 @@ class TodoCreate(TodoBase):
 class Todo(TodoBase):
     id: int
     order: int = 0
+    rank: str | None = None
+    version: int | None = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+class TodoUpdate(TodoBase):
+    """Update payload; with ``version`` set the update only applies if the todo is still at that version."""
+    version: int | None = None
+
+class TodoChanges(BaseModel):
+    """Todos written and deleted after the ``since`` version, up to ``version``."""
+    version: int
+    todos: List[Todo] = []
+    deleted: List[int] = []
 
 class TodoReorder(BaseModel):
     """Schema for reordering todos - list of todo IDs in new order."""
     order: List[int]
 
+class TodoBatchOperation(BaseModel):
+    """One operation of a todo batch; ``id`` is required except for create."""
+    op: Literal["create", "update", "delete", "toggle"]
+    id: int | None = None
+    title: str | None = None
+    completed: bool | None = None
+
+class TodoBatch(BaseModel):
+    operations: List[TodoBatchOperation]
+
+class TodoBatchResult(BaseModel):
+    op: str
+    id: int | None = None
+    ok: bool
+    todo: Todo | None = None
+    error: str | None = None
+
+class TodoMove(BaseModel):
+    """Place a todo directly after ``after`` and/or before ``before`` (todo IDs); neither means the end."""
+    before: int | None = None
+    after: int | None = None
+
 class GithubLabel(BaseModel):
     name: str
     color: str
@@ -33,6 +66,20 @@ class GithubPR(BaseModel):
     labels: List[GithubLabel] = []
     mergeable: bool | None = None
     mergeable_state: str | None = None
+    review_decision: str | None = None
+
+class GithubRateLimit(BaseModel):
+    """Budget of one GitHub rate-limit resource (core, search, graphql) as last reported by GitHub."""
+    resource: str
+    limit: int | None = None
+    remaining: int | None = None
+    used: int | None = None
+    reset_at: float | None = None
+    blocked_until: float | None = None
+    requests: int = 0
+    delayed: int = 0
+    deferred: int = 0
+    throttled: int = 0
 
 class JiraIssue(BaseModel):
     key: str
@@ -49,10 +96,48 @@ class CalendarEvent(BaseModel):
     location: str | None = None
     html_link: str
 
+class CalendarDay(BaseModel):
+    date: str
+    events: List[CalendarEvent] = []
+
 class GmailUnreadCount(BaseModel):
     count: int
 
+class GmailLabelCount(BaseModel):
+    unread: int
+    total: int
+    estimated: bool = False  # True for search queries (Gmail's resultSizeEstimate)
+
+class GmailLabelCounts(BaseModel):
+    """Counts per configured label or search query (GMAIL_COUNT_LABELS)."""
+    counts: Dict[str, GmailLabelCount] = {}
+
+class GmailArrival(BaseModel):
+    """An unread inbox message seen arriving through Gmail history polling."""
+    id: str
+    thread_id: str
+    seen_at: str
+
 class GoogleAuthStatus(BaseModel):
     status: str
     message: str
     auth_url: str | None = None
+
+class DashboardSourceStatus(BaseModel):
+    """Outcome and freshness of a single source inside the aggregated dashboard payload."""
+    status: str
+    duration_ms: float | None = None
+    error: str | None = None
+    age_seconds: float | None = None
+    refresh_interval: int | None = None
+
+class Dashboard(BaseModel):
+    """Combined payload for every widget, fetched concurrently."""
+    github_prs: List[GithubPR] = []
+    my_prs: List[GithubPR] = []
+    jira_tasks: List[JiraIssue] = []
+    calendar_events: List[CalendarEvent] = []
+    gmail_unread: GmailUnreadCount | None = None
+    gmail_counts: GmailLabelCounts | None = None
+    todos: List[Todo] = []
+    sources: Dict[str, DashboardSourceStatus] = {}
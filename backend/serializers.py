@@ -0,0 +1,34 @@
+"""
+Precompiled JSON serializers for the large list payloads.
+
+FastAPI's default path validates a route's return value against its
+response_model, converts it to JSON-compatible Python objects and then encodes
+that with the json module. For lists that are already validated schema objects
+(everything the refresh scheduler serves) that is wasted work: a TypeAdapter
+built once at import time serializes them straight to JSON bytes in
+pydantic-core. Routes return ``json_response(...)`` and keep ``response_model``
+for the OpenAPI schema only.
+"""
+
+from typing import Any, List, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+import schemas
+
+github_prs = TypeAdapter(List[schemas.GithubPR])
+jira_issues = TypeAdapter(List[schemas.JiraIssue])
+calendar_events = TypeAdapter(List[schemas.CalendarEvent])
+calendar_days = TypeAdapter(List[schemas.CalendarDay])
+todos = TypeAdapter(List[schemas.Todo])
+
+
+def json_response(adapter: TypeAdapter, value: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Serialize ``value`` (already instances of the adapter's type) into a JSON response."""
+    return Response(adapter.dump_json(value), media_type="application/json", headers=headers)
+
+
+def todos_response(rows: List[Any], headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Serialize todo ORM objects or result rows, which still need converting to schemas.Todo."""
+    return json_response(todos, todos.validate_python(rows), headers)
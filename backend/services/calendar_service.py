@@ -1,67 +1,484 @@
-from datetime import datetime, timedelta
-from typing import List
-from schemas import CalendarEvent
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+from googleapiclient.errors import HttpError
+from schemas import CalendarDay, CalendarEvent
 from services.google_auth import get_credentials, CREDENTIALS_PATH, TOKEN_PATH
-from googleapiclient.discovery import build
+from services.google_clients import borrow_service
 import os
+import threading
+import time
+
+# "sync" (local event store kept current with syncToken) or "full" (list today's events on every refresh)
+CALENDAR_SYNC_MODE = os.getenv("CALENDAR_SYNC_MODE", "sync").strip('"\'').lower()
+# Days of past and future events kept in the synced event store
+CALENDAR_SYNC_PAST_DAYS = int(os.getenv("CALENDAR_SYNC_PAST_DAYS", "7"))
+CALENDAR_SYNC_FUTURE_DAYS = int(os.getenv("CALENDAR_SYNC_FUTURE_DAYS", "60"))
+# Events per page when syncing (API maximum is 2500)
+CALENDAR_SYNC_PAGE_SIZE = 250
+# Seconds a day bucket (or the synced event store) is considered fresh for range queries
+CALENDAR_DAY_TTL = int(os.getenv("CALENDAR_DAY_TTL", "300"))
+# Day buckets kept (least recently used are evicted); one per (timezone, day)
+CALENDAR_DAY_CACHE_MAX_ENTRIES = int(os.getenv("CALENDAR_DAY_CACHE_MAX_ENTRIES", "1000"))
+
+
+class CalendarUnavailable(Exception):
+    """Google Calendar failed and there is no cached data to answer with."""
+
+
+def _parse_event_time(value: dict) -> datetime:
+    """Parse an event start/end: timed events carry dateTime, all-day events only date (read as UTC midnight)."""
+    if value.get("dateTime"):
+        return datetime.fromisoformat(value["dateTime"].replace("Z", "+00:00")).astimezone(timezone.utc)
+    return datetime.fromisoformat(value["date"]).replace(tzinfo=timezone.utc)
+
+
+class EventStore:
+    """In-memory copy of the primary calendar, indexed by start time for cheap range queries.
+
+    Kept current with Calendar's incremental sync: after one full sync, each
+    refresh sends the stored syncToken and only receives changed events. Only
+    events overlapping [window_start, window_end) are kept; the start slides
+    forward (pruning past events) on every sync.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sync_token: Optional[str] = None
+        self.window_start: Optional[datetime] = None  # earliest instant covered by the sync
+        self.window_end: Optional[datetime] = None  # instant the sync covers up to (exclusive)
+        self.synced_at: Optional[float] = None
+        self._events: Dict[str, dict] = {}
+        self._bounds: Dict[str, Tuple[datetime, datetime]] = {}
+        self._index: List[Tuple[datetime, str]] = []  # sorted (start, event id)
+        self._max_duration = timedelta(0)
+
+    def reset(self) -> None:
+        self.sync_token = None
+        self.window_start = None
+        self.window_end = None
+        self.synced_at = None
+        self._events.clear()
+        self._bounds.clear()
+        self._index.clear()
+        self._max_duration = timedelta(0)
+
+    def remove(self, event_id: str) -> None:
+        bounds = self._bounds.pop(event_id, None)
+        self._events.pop(event_id, None)
+        if bounds is not None:
+            pos = bisect_left(self._index, (bounds[0], event_id))
+            if pos < len(self._index) and self._index[pos] == (bounds[0], event_id):
+                del self._index[pos]
+
+    def upsert(self, event: dict) -> None:
+        event_id = event["id"]
+        self.remove(event_id)
+        start = _parse_event_time(event["start"])
+        end = _parse_event_time(event["end"])
+        self._events[event_id] = event
+        self._bounds[event_id] = (start, end)
+        insort(self._index, (start, event_id))
+        self._max_duration = max(self._max_duration, end - start)
+
+    def in_window(self, event: dict) -> bool:
+        start = _parse_event_time(event["start"])
+        end = _parse_event_time(event["end"])
+        return end > self.window_start and start < self.window_end
+
+    def prune(self) -> int:
+        """Drop events that no longer overlap the window; returns how many were dropped."""
+        stale = [
+            event_id for event_id, (start, end) in self._bounds.items()
+            if end <= self.window_start or start >= self.window_end
+        ]
+        for event_id in stale:
+            self.remove(event_id)
+        return len(stale)
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.window_start is not None and self.window_start <= start and end <= self.window_end
+
+    def range(self, start: datetime, end: datetime) -> List[dict]:
+        """Events overlapping [start, end), ordered by start time."""
+        # Nothing starting earlier than start - longest event can still overlap the range
+        lo = bisect_left(self._index, (start - self._max_duration, ""))
+        hi = bisect_left(self._index, (end, ""))
+        return [
+            self._events[event_id]
+            for _, event_id in self._index[lo:hi]
+            if self._bounds[event_id][1] > start
+        ]
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+_store = EventStore()
+
+
+def _sync_events(service) -> None:
+    """Bring the event store up to date (call with _store.lock held).
+
+    Uses the stored syncToken when there is one; otherwise (first run, the
+    token expired with 410 Gone, or less than half of CALENDAR_SYNC_FUTURE_DAYS
+    is still ahead of the window end) does a full sync of the window from
+    CALENDAR_SYNC_PAST_DAYS ago to CALENDAR_SYNC_FUTURE_DAYS ahead. Bounding the
+    window keeps recurring events from expanding into every future instance.
+    """
+    params = {
+        "calendarId": "primary",
+        "singleEvents": True,
+        "maxResults": CALENDAR_SYNC_PAGE_SIZE,
+    }
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    window_start = today - timedelta(days=CALENDAR_SYNC_PAST_DAYS)
+    full = (
+        _store.sync_token is None
+        or _store.window_end is None
+        or _store.window_end - today < timedelta(days=CALENDAR_SYNC_FUTURE_DAYS / 2)
+    )
+    if full:
+        _store.reset()
+        _store.window_start = window_start
+        _store.window_end = today + timedelta(days=CALENDAR_SYNC_FUTURE_DAYS)
+        params["timeMin"] = _store.window_start.isoformat()
+        params["timeMax"] = _store.window_end.isoformat()
+    else:
+        params["syncToken"] = _store.sync_token
+        # Slide the start forward so past events do not pile up
+        _store.window_start = max(_store.window_start, window_start)
+        _store.prune()
+
+    changed = 0
+    page_token = None
+    while True:
+        try:
+            result = service.events().list(pageToken=page_token, **params).execute()
+        except HttpError as e:
+            if not full and e.resp.status == 410:
+                print("Calendar sync token expired. Running a full sync.")
+                _store.reset()
+                return _sync_events(service)
+            raise
+
+        for event in result.get("items", []):
+            changed += 1
+            if event.get("status") == "cancelled":
+                _store.remove(event["id"])
+            elif "start" in event and "end" in event:
+                # Incremental results are not limited to the window
+                if _store.in_window(event):
+                    _store.upsert(event)
+                else:
+                    _store.remove(event["id"])
+
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            _store.sync_token = result.get("nextSyncToken")
+            _store.synced_at = time.time()
+            break
+
+    if full:
+        print(f"Calendar: full sync stored {len(_store)} events")
+    elif changed:
+        print(f"Calendar: incremental sync applied {changed} changes")
+
+
+def _to_calendar_event(event: dict) -> CalendarEvent:
+    # Handle all-day events vs timed events
+    start = event['start'].get('dateTime', event['start'].get('date'))
+    end = event['end'].get('dateTime', event['end'].get('date'))
+
+    return CalendarEvent(
+        summary=event.get('summary', 'No title'),
+        start_time=start,
+        end_time=end,
+        location=event.get('location', ''),
+        html_link=event.get('htmlLink', '')
+    )
+
+
+def _get_todays_events_synced(service, start_of_day: datetime, end_of_day: datetime) -> List[CalendarEvent]:
+    """Sync the event store and answer today's view from it (no result cap)."""
+    with _store.lock:
+        try:
+            _sync_events(service)
+        except Exception as e:
+            if _store.sync_token is None:
+                raise
+            print(f"Calendar sync failed, serving stored events: {e}")
+        events = _store.range(start_of_day, end_of_day)
+    return [_to_calendar_event(event) for event in events]
+
+
+# =============================================================================
+# DAY-BUCKETED RANGE QUERIES (week / month views)
+# =============================================================================
+
+# (tz name, day) -> (fetched at, raw events on that day), in LRU order
+_day_buckets: "OrderedDict[Tuple[str, date], Tuple[float, List[dict]]]" = OrderedDict()
+_buckets_lock = threading.Lock()
+# Days currently being prefetched, so overlapping prefetches are skipped
+_prefetching: Set[Tuple[str, date]] = set()
+
+
+def _day_bounds(day: date, tz: ZoneInfo) -> Tuple[datetime, datetime]:
+    """UTC instants of local midnight at the start and end of a day."""
+    start = datetime.combine(day, dt_time.min, tzinfo=tz)
+    end = datetime.combine(day + timedelta(days=1), dt_time.min, tzinfo=tz)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def _event_days(event: dict, days: Iterable[date], tz: ZoneInfo) -> List[date]:
+    """Days an event falls on: all-day events by their dates, timed events by overlap in tz."""
+    if "date" in event["start"] and "dateTime" not in event["start"]:
+        first = date.fromisoformat(event["start"]["date"])
+        last = date.fromisoformat(event["end"]["date"])  # exclusive
+        return [day for day in days if first <= day < last]
+
+    start = _parse_event_time(event["start"])
+    end = _parse_event_time(event["end"])
+    result = []
+    for day in days:
+        day_start, day_end = _day_bounds(day, tz)
+        if start < day_end and end > day_start:
+            result.append(day)
+    return result
+
+
+def _event_start(event: dict) -> datetime:
+    return _parse_event_time(event["start"])
+
+
+def _contiguous_runs(days: List[date]) -> List[List[date]]:
+    runs: List[List[date]] = []
+    for day in sorted(days):
+        if runs and day - runs[-1][-1] == timedelta(days=1):
+            runs[-1].append(day)
+        else:
+            runs.append([day])
+    return runs
+
+
+def _get_bucket(key: Tuple[str, date]) -> Optional[Tuple[float, List[dict]]]:
+    """Cached bucket for (tz name, day), marking it recently used (call with _buckets_lock held)."""
+    bucket = _day_buckets.get(key)
+    if bucket is not None:
+        _day_buckets.move_to_end(key)
+    return bucket
+
+
+def _put_bucket(key: Tuple[str, date], bucket: Tuple[float, List[dict]]) -> None:
+    """Store a bucket, evicting the least recently used ones (call with _buckets_lock held)."""
+    _day_buckets[key] = bucket
+    _day_buckets.move_to_end(key)
+    while len(_day_buckets) > CALENDAR_DAY_CACHE_MAX_ENTRIES:
+        _day_buckets.popitem(last=False)
+
+
+def _fetch_days(service, days: List[date], tz_name: str) -> Dict[date, List[dict]]:
+    """Fetch the given days from Google (one list call per contiguous run) into day buckets.
+
+    Returns the fetched events per day.
+    """
+    tz = ZoneInfo(tz_name)
+    fetched: Dict[date, List[dict]] = {}
+    for run in _contiguous_runs(days):
+        time_min, _ = _day_bounds(run[0], tz)
+        _, time_max = _day_bounds(run[-1], tz)
+
+        events = []
+        page_token = None
+        while True:
+            result = service.events().list(
+                calendarId='primary',
+                timeMin=time_min.isoformat(),
+                timeMax=time_max.isoformat(),
+                singleEvents=True,
+                orderBy='startTime',
+                maxResults=CALENDAR_SYNC_PAGE_SIZE,
+                pageToken=page_token
+            ).execute()
+            events.extend(result.get("items", []))
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                break
+
+        per_day: Dict[date, List[dict]] = {day: [] for day in run}
+        for event in events:
+            for day in _event_days(event, run, tz):
+                per_day[day].append(event)
+
+        fetched_at = time.time()
+        with _buckets_lock:
+            for day, day_events in per_day.items():
+                _put_bucket((tz_name, day), (fetched_at, day_events))
+        fetched.update(per_day)
+    return fetched
+
+
+def _prefetch_days(days: List[date], tz_name: str) -> None:
+    """Fetch adjacent days in the background so paging a week/month view is already cached."""
+    now = time.time()
+    with _buckets_lock:
+        missing = [
+            day for day in days
+            if (tz_name, day) not in _prefetching
+            and now - (_day_buckets.get((tz_name, day)) or (0.0, None))[0] >= CALENDAR_DAY_TTL
+        ]
+        _prefetching.update((tz_name, day) for day in missing)
+    if not missing:
+        return
+
+    def run():
+        try:
+            creds = get_credentials()
+            if creds:
+                with borrow_service('calendar', 'v3', creds) as service:
+                    _fetch_days(service, missing, tz_name)
+        except Exception as e:
+            print(f"Calendar prefetch failed: {e}")
+        finally:
+            with _buckets_lock:
+                _prefetching.difference_update((tz_name, day) for day in missing)
+
+    threading.Thread(target=run, name="calendar-prefetch", daemon=True).start()
+
+
+def _build_days(days: List[date], events_by_day: Dict[date, List[dict]]) -> List[CalendarDay]:
+    return [
+        CalendarDay(
+            date=day.isoformat(),
+            events=[_to_calendar_event(event) for event in sorted(events_by_day.get(day, []), key=_event_start)]
+        )
+        for day in days
+    ]
+
+
+def get_events_range(start: date, end: date, tz_name: str = "UTC") -> List[CalendarDay]:
+    """Events for each day from start to end (inclusive) in the given timezone.
+
+    Days covered by the synced event store are answered from memory; other days
+    come from per-day buckets, and only missing or stale days are fetched from
+    Google. The same number of days before and after the range is prefetched
+    in the background. If Google fails, stale buckets are served; with nothing
+    cached for a missing day CalendarUnavailable is raised.
+    """
+    tz = ZoneInfo(tz_name)
+    days = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+    if not os.path.exists(CREDENTIALS_PATH) and not os.path.exists(TOKEN_PATH):
+        print("Google Calendar not configured. Returning empty range.")
+        return _build_days(days, {})
+
+    creds = get_credentials()
+    if not creds:
+        print("Could not get Google credentials. Returning empty range.")
+        return _build_days(days, {})
+
+    events_by_day: Dict[date, List[dict]] = {}
+    missing: List[date] = []
+    now = time.time()
+
+    store_days: List[date] = []
+    window: Optional[Tuple[datetime, datetime]] = None
+    if CALENDAR_SYNC_MODE == "sync":
+        with _store.lock:
+            if _store.synced_at is None or now - _store.synced_at >= CALENDAR_DAY_TTL:
+                try:
+                    with borrow_service('calendar', 'v3', creds) as service:
+                        _sync_events(service)
+                except Exception as e:
+                    print(f"Calendar sync failed, using day buckets: {e}")
+            if _store.sync_token and _store.window_start is not None:
+                window = (_store.window_start, _store.window_end)
+                store_days = [day for day in days if _store.covers(*_day_bounds(day, tz))]
+                if store_days:
+                    # Widen by a day on each side so all-day events are placed by their own dates
+                    range_start = _day_bounds(store_days[0], tz)[0] - timedelta(days=1)
+                    range_end = _day_bounds(store_days[-1], tz)[1] + timedelta(days=1)
+                    for event in _store.range(range_start, range_end):
+                        for day in _event_days(event, store_days, tz):
+                            events_by_day.setdefault(day, []).append(event)
+
+    stale: Dict[date, List[dict]] = {}
+    with _buckets_lock:
+        for day in days:
+            if day in store_days:
+                continue
+            bucket = _get_bucket((tz_name, day))
+            if bucket is not None and now - bucket[0] < CALENDAR_DAY_TTL:
+                events_by_day[day] = bucket[1]
+            else:
+                missing.append(day)
+                if bucket is not None:
+                    stale[day] = bucket[1]
+
+    if missing:
+        try:
+            with borrow_service('calendar', 'v3', creds) as service:
+                events_by_day.update(_fetch_days(service, missing, tz_name))
+        except Exception as e:
+            if len(stale) < len(missing):
+                raise CalendarUnavailable(f"Google Calendar request failed: {e}") from e
+            print(f"Calendar range fetch failed, serving cached days: {e}")
+            events_by_day.update(stale)
+
+    span = timedelta(days=len(days))
+    adjacent = [day - span for day in days] + [day + span for day in days]
+    if window is not None:
+        # Days inside the synced window never need fetching
+        adjacent = [
+            day for day in adjacent
+            if not (window[0] <= _day_bounds(day, tz)[0] and _day_bounds(day, tz)[1] <= window[1])
+        ]
+    _prefetch_days(adjacent, tz_name)
+
+    return _build_days(days, events_by_day)
 
 
 def get_todays_events() -> List[CalendarEvent]:
-    """Fetch today's events from Google Calendar."""
+    """Fetch today's events from Google Calendar.
+
+    Mock events are returned only when Google is not configured; upstream and
+    auth failures raise so the refresh scheduler keeps the previous events.
+    """
     
     # Check if credentials file exists
     if not os.path.exists(CREDENTIALS_PATH) and not os.path.exists(TOKEN_PATH):
         print("Google Calendar not configured. Using mock data.")
         return _get_mock_events()
     
-    try:
-        creds = get_credentials()
-        if not creds:
-            print("Could not get Google credentials. Using mock data.")
-            return _get_mock_events()
-        
-        # Build the Calendar API service
-        service = build('calendar', 'v3', credentials=creds)
-        
-        # Get today's time range (UTC)
-        now = datetime.utcnow()
-        start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end_of_day = start_of_day + timedelta(days=1)
-        
-        time_min = start_of_day.isoformat() + 'Z'
-        time_max = end_of_day.isoformat() + 'Z'
+    creds = get_credentials()
+    if not creds:
+        raise RuntimeError("Could not get Google credentials")
+    
+    # Get today's time range (UTC)
+    now = datetime.now(timezone.utc)
+    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    end_of_day = start_of_day + timedelta(days=1)
+    
+    # Reuse a pooled Calendar API service for these credentials
+    with borrow_service('calendar', 'v3', creds) as service:
+        if CALENDAR_SYNC_MODE == "sync":
+            return _get_todays_events_synced(service, start_of_day, end_of_day)
         
         # Fetch events
         events_result = service.events().list(
             calendarId='primary',
-            timeMin=time_min,
-            timeMax=time_max,
+            timeMin=start_of_day.isoformat(),
+            timeMax=end_of_day.isoformat(),
             maxResults=20,
             singleEvents=True,
             orderBy='startTime'
         ).execute()
-        
-        events = events_result.get('items', [])
-        
-        calendar_events = []
-        for event in events:
-            # Handle all-day events vs timed events
-            start = event['start'].get('dateTime', event['start'].get('date'))
-            end = event['end'].get('dateTime', event['end'].get('date'))
-            
-            calendar_events.append(CalendarEvent(
-                summary=event.get('summary', 'No title'),
-                start_time=start,
-                end_time=end,
-                location=event.get('location', ''),
-                html_link=event.get('htmlLink', '')
-            ))
-        
-        return calendar_events
-        
-    except Exception as e:
-        print(f"Error fetching calendar events: {e}")
-        return _get_mock_events()
+    
+    events = events_result.get('items', [])
+    
+    return [_to_calendar_event(event) for event in events]
 
 
 def _get_mock_events() -> List[CalendarEvent]:
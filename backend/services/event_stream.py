@@ -0,0 +1,180 @@
+"""
+Server-Sent Events broker for widget updates.
+
+Publishes one event per changed source: a refresh-scheduler source whose
+value changed (event name = source name, e.g. ``github_prs``) or a committed
+todo write (``todos``, with the new todo version). Every open dashboard gets
+the event as soon as the server-side data changes and refetches only that
+widget, which is served from the scheduler cache, so the number of open
+dashboards never multiplies upstream polling.
+
+Events carry ids of the form ``<epoch>-<n>``: the epoch identifies this
+process and ``n`` increases per event. The last SSE_BUFFER_SIZE events are
+kept in a ring buffer, so a reconnecting client (``Last-Event-ID``) is sent
+what it missed; if it missed more than the buffer holds, or its id comes from
+an earlier process (a backend restart), it is sent ``resync`` instead.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Set
+
+import crud
+from services.refresh_scheduler import scheduler, SourceEntry
+
+# Events kept for Last-Event-ID resume
+SSE_BUFFER_SIZE = int(os.getenv("SSE_BUFFER_SIZE", "256"))
+# Seconds between heartbeat comments on an idle stream
+SSE_HEARTBEAT_INTERVAL = int(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+# Events queued per client before a slow client is disconnected (it resumes from Last-Event-ID)
+SSE_CLIENT_QUEUE_SIZE = 100
+
+
+class ServerEvent:
+    __slots__ = ("epoch", "id", "event", "data")
+
+    def __init__(self, epoch: str, event_id: int, event: str, data: Dict[str, Any]):
+        self.epoch = epoch
+        self.id = event_id
+        self.event = event
+        self.data = data
+
+    def encode(self) -> str:
+        return f"id: {self.epoch}-{self.id}\nevent: {self.event}\ndata: {json.dumps(self.data)}\n\n"
+
+
+class EventBroker:
+    """Fans events out to connected SSE clients and remembers recent ones."""
+
+    def __init__(self, buffer_size: int = SSE_BUFFER_SIZE):
+        # Distinguishes this process's event ids from those of an earlier run
+        self.epoch = format(time.time_ns() // 1_000_000, "x")
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._next_id = 1
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Remember the event loop so worker threads can publish (call from the running loop)."""
+        self._loop = loop
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Publish an event (from the event loop)."""
+        server_event = ServerEvent(self.epoch, self._next_id, event, data)
+        self._next_id += 1
+        self._buffer.append(server_event)
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(server_event)
+            except asyncio.QueueFull:
+                # Too far behind: end its stream (None) in place of its oldest
+                # event; the client reconnects and resumes from Last-Event-ID
+                self._subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def publish_threadsafe(self, event: str, data: Dict[str, Any]) -> None:
+        """Publish an event from any thread (no-op before ``bind``)."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        if _on_loop(loop):
+            self.publish(event, data)
+        else:
+            loop.call_soon_threadsafe(self.publish, event, data)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SSE_CLIENT_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def parse_id(self, event_id: str) -> Optional[int]:
+        """Sequence number of an event id issued by this process, else None."""
+        epoch, _, number = event_id.rpartition("-")
+        if epoch != self.epoch or not number.isdigit():
+            return None
+        return int(number)
+
+    def events_after(self, last_id: int) -> Optional[List[ServerEvent]]:
+        """Buffered events after ``last_id``, or None if some of them were already dropped."""
+        if last_id > self.last_id:
+            return None
+        events = [event for event in self._buffer if event.id > last_id]
+        oldest = self._buffer[0].id if self._buffer else self._next_id
+        if last_id + 1 < oldest:
+            return None
+        return events
+
+    @property
+    def last_id(self) -> int:
+        return self._next_id - 1
+
+
+def _on_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
+
+
+broker = EventBroker()
+
+
+async def stream(last_event_id: Optional[str] = None):
+    """Yield SSE text for one client: missed events, then live events and heartbeats."""
+    queue = broker.subscribe()
+    try:
+        yield "retry: 5000\n\n"
+        sent_id = broker.last_id
+        if last_event_id is not None:
+            resume_from = broker.parse_id(last_event_id)
+            missed = None if resume_from is None else broker.events_after(resume_from)
+            if missed is None:
+                # Unknown id (older process, malformed) or events already dropped
+                yield ServerEvent(broker.epoch, sent_id, "resync", {}).encode()
+            else:
+                for event in missed:
+                    yield event.encode()
+                    sent_id = event.id
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            if event is None:
+                return
+            # Already replayed from the buffer
+            if event.id <= sent_id:
+                continue
+            yield event.encode()
+            sent_id = event.id
+    finally:
+        broker.unsubscribe(queue)
+
+
+def _scheduler_changed(name: str, entry: SourceEntry) -> None:
+    broker.publish(name, {"source": name, "updated_at": entry.updated_at})
+
+
+def _todos_changed(version: int) -> None:
+    broker.publish_threadsafe("todos", {"source": "todos", "version": version})
+
+
+_listening = False
+
+
+def start() -> None:
+    """Connect the broker to scheduler and todo changes (call from the running event loop)."""
+    global _listening
+    broker.bind(asyncio.get_running_loop())
+    if not _listening:
+        scheduler.add_change_listener(_scheduler_changed)
+        crud.add_change_listener(_todos_changed)
+        _listening = True
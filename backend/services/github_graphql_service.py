@@ -0,0 +1,271 @@
+"""
+GitHub backend built on the GraphQL API.
+
+Fetches review-requested PRs (user + teams) and authored PRs, including labels,
+mergeable state and review decision, with all searches batched as aliases of a
+single query document. Each round trip only re-sends the searches that still
+have more pages (cursor pagination), so a refresh costs a small, fixed number
+of requests instead of one search per team chunk plus one REST call per PR.
+
+Selected with GITHUB_BACKEND=graphql (see github_service).
+"""
+
+import os
+import time
+from typing import Dict, List, Optional, Set
+from schemas import GithubPR
+from services import http_client
+from services.github_rate_limit import RateLimited, is_throttled, resource_for
+
+GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_GRAPHQL_URL = "https://api.github.com/graphql"
+
+# Results per search page (GraphQL maximum is 100)
+PAGE_SIZE = 50
+# Safety cap on pagination rounds per refresh
+MAX_PAGES = 10
+# Team qualifiers per search (GitHub search allows at most 5 boolean operators)
+CHUNK_SIZE = 5
+# Seconds before team membership is fetched again (shared with the REST backend)
+GITHUB_TEAMS_TTL = int(os.getenv("GITHUB_TEAMS_TTL", "3600"))
+
+_PR_SEARCH_FRAGMENT = """
+fragment PrSearch on SearchResultItemConnection {
+  pageInfo { hasNextPage endCursor }
+  nodes {
+    ... on PullRequest {
+      title
+      url
+      state
+      createdAt
+      author { login }
+      repository { nameWithOwner }
+      labels(first: 20) { nodes { name color } }
+      mergeable
+      mergeStateStatus
+      reviewDecision
+    }
+  }
+}
+"""
+
+_TEAMS_QUERY = """
+query($login: String!, $cursor: String) {
+  viewer {
+    organizations(first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        login
+        teams(first: 100, userLogins: [$login]) { nodes { slug } }
+      }
+    }
+  }
+}
+"""
+
+# GraphQL MergeableState -> REST "mergeable" boolean
+_MERGEABLE_MAP = {"MERGEABLE": True, "CONFLICTING": False, "UNKNOWN": None}
+
+# Viewer login (fetched once) and teams (revalidated every GITHUB_TEAMS_TTL seconds)
+_viewer_login: Optional[str] = None
+_user_teams_cache: Set[str] = set()
+_teams_fetched_at: Optional[float] = None
+
+# Last complete result per search query, served when that search fails
+_last_search_nodes: Dict[str, List[dict]] = {}
+
+
+def _headers() -> dict:
+    return {"Authorization": f"bearer {GITHUB_TOKEN}"}
+
+
+def _graphql_body(query: str, variables: dict) -> dict:
+    """Run a GraphQL query and return the whole response body (data and errors)."""
+    response = http_client.post(
+        GITHUB_GRAPHQL_URL,
+        headers=_headers(),
+        json={"query": query, "variables": variables}
+    )
+    if is_throttled(response):
+        raise RateLimited(resource_for(GITHUB_GRAPHQL_URL), None)
+    response.raise_for_status()
+    return response.json()
+
+
+def _graphql(query: str, variables: dict) -> dict:
+    """Run a GraphQL query and return its data, logging (but tolerating) partial errors."""
+    body = _graphql_body(query, variables)
+    if body.get("errors"):
+        print(f"GitHub GraphQL errors: {body['errors']}")
+    return body.get("data") or {}
+
+
+def _get_viewer_login() -> Optional[str]:
+    global _viewer_login
+
+    if _viewer_login is None:
+        data = _graphql("query { viewer { login } }", {})
+        _viewer_login = (data.get("viewer") or {}).get("login")
+    return _viewer_login
+
+
+def _get_user_teams() -> Set[str]:
+    """Fetch all teams (org/team-slug) the authenticated user belongs to."""
+    global _user_teams_cache, _teams_fetched_at
+
+    if _teams_fetched_at is not None and time.monotonic() - _teams_fetched_at < GITHUB_TEAMS_TTL:
+        return _user_teams_cache
+
+    try:
+        login = _get_viewer_login()
+        if not login:
+            return _user_teams_cache
+
+        teams = set()
+        cursor = None
+        for _ in range(MAX_PAGES):
+            data = _graphql(_TEAMS_QUERY, {"login": login, "cursor": cursor})
+            orgs = (data.get("viewer") or {}).get("organizations") or {}
+            for org in orgs.get("nodes") or []:
+                for team in (org.get("teams") or {}).get("nodes") or []:
+                    teams.add(f"{org['login']}/{team['slug']}")
+            page_info = orgs.get("pageInfo") or {}
+            if not page_info.get("hasNextPage"):
+                break
+            cursor = page_info.get("endCursor")
+
+        if teams != _user_teams_cache:
+            print(f"GitHub GraphQL: Found {len(teams)} teams: {teams}")
+        _user_teams_cache = teams
+        _teams_fetched_at = time.monotonic()
+        return teams
+
+    except Exception as e:
+        print(f"Error fetching user teams via GraphQL: {e}")
+        if _teams_fetched_at is None:
+            # Never fetched: team PRs would silently be missing from the result
+            raise
+        # Don't cache failure, so we retry next time
+        return _user_teams_cache
+
+
+def _search_all(queries: List[str]) -> List[dict]:
+    """Run several PR searches as aliases of one query document, paginating each.
+
+    Returns the PullRequest nodes of every search, in query order. A search
+    that comes back null (its error is logged) is answered with its last
+    complete result, so one failing team chunk keeps its PRs.
+    """
+    results: Dict[int, List[dict]] = {i: [] for i in range(len(queries))}
+    cursors: Dict[int, Optional[str]] = {i: None for i in range(len(queries))}
+    pending = list(range(len(queries)))
+
+    for _ in range(MAX_PAGES):
+        if not pending:
+            break
+
+        var_defs = []
+        fields = []
+        variables = {}
+        for i in pending:
+            var_defs.append(f"$q{i}: String!, $c{i}: String")
+            fields.append(f"s{i}: search(query: $q{i}, type: ISSUE, first: {PAGE_SIZE}, after: $c{i}) {{ ...PrSearch }}")
+            variables[f"q{i}"] = queries[i]
+            variables[f"c{i}"] = cursors[i]
+        document = f"query({', '.join(var_defs)}) {{\n  " + "\n  ".join(fields) + "\n}\n" + _PR_SEARCH_FRAGMENT
+
+        body = _graphql_body(document, variables)
+        data = body.get("data") or {}
+        errors = body.get("errors") or []
+        if errors:
+            print(f"GitHub GraphQL errors: {errors}")
+
+        still_pending = []
+        for i in pending:
+            connection = data.get(f"s{i}")
+            if not connection:
+                messages = [
+                    error.get("message") for error in errors
+                    if (error.get("path") or [None])[0] == f"s{i}"
+                ]
+                print(
+                    f"GitHub GraphQL: search failed ({'; '.join(messages) or 'no data'}); "
+                    f"serving last-known results for: {queries[i]}"
+                )
+                results[i] = list(_last_search_nodes.get(queries[i], []))
+                continue
+            results[i].extend(node for node in connection.get("nodes") or [] if node)
+            page_info = connection.get("pageInfo") or {}
+            if page_info.get("hasNextPage"):
+                cursors[i] = page_info.get("endCursor")
+                still_pending.append(i)
+            else:
+                _last_search_nodes[queries[i]] = results[i]
+        pending = still_pending
+
+    return [node for i in range(len(queries)) for node in results[i]]
+
+
+def _parse_pr_node(node: dict) -> GithubPR:
+    """Map a GraphQL PullRequest node onto the REST-shaped GithubPR schema."""
+    labels = [
+        {"name": l["name"], "color": l["color"]}
+        for l in (node.get("labels") or {}).get("nodes") or []
+    ]
+    merge_state = node.get("mergeStateStatus")
+
+    return GithubPR(
+        title=node["title"],
+        url=node["url"],
+        repo=node["repository"]["nameWithOwner"],
+        author=(node.get("author") or {}).get("login", "ghost"),
+        created_at=node["createdAt"],
+        state=node["state"].lower(),
+        labels=labels,
+        mergeable=_MERGEABLE_MAP.get(node.get("mergeable")),
+        mergeable_state=merge_state.lower() if merge_state else None,
+        review_decision=node.get("reviewDecision")
+    )
+
+
+def _to_prs(nodes: List[dict]) -> List[GithubPR]:
+    """Parse nodes, deduplicating by URL."""
+    all_prs = {}
+    for node in nodes:
+        if "url" in node and node["url"] not in all_prs:
+            all_prs[node["url"]] = _parse_pr_node(node)
+    return list(all_prs.values())
+
+
+def get_review_requested_prs() -> List[GithubPR]:
+    """Get PRs where review is requested from user or their teams."""
+    if not GITHUB_TOKEN:
+        print("Warning: GITHUB_TOKEN not set")
+        return []
+
+    queries = ["type:pr state:open review-requested:@me"]
+
+    teams = sorted(_get_user_teams())
+    for i in range(0, len(teams), CHUNK_SIZE):
+        chunk = teams[i:i + CHUNK_SIZE]
+        if len(chunk) > 1:
+            teams_part = " OR ".join([f"team-review-requested:{t}" for t in chunk])
+            queries.append(f"type:pr state:open ( {teams_part} )")
+        else:
+            queries.append(f"type:pr state:open team-review-requested:{chunk[0]}")
+
+    # Errors (including RateLimited) fail the refresh, so the scheduler keeps the last-known list
+    prs = _to_prs(_search_all(queries))
+
+    # Sort by created_at descending
+    prs.sort(key=lambda x: x.created_at, reverse=True)
+    return prs
+
+
+def get_my_prs() -> List[GithubPR]:
+    """Get open PRs created by the authenticated user, with mergeable info inline."""
+    if not GITHUB_TOKEN:
+        print("Warning: GITHUB_TOKEN not set")
+        return []
+
+    return _to_prs(_search_all(["type:pr state:open author:@me sort:created-desc"]))
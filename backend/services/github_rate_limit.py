@@ -0,0 +1,226 @@
+"""
+GitHub rate-limit budget, tracked per resource (core, search, graphql).
+
+Every GitHub response reports its resource's budget in ``X-RateLimit-*``
+headers; throttled responses (429, or 403 from the primary or secondary
+limit) may add ``Retry-After``. http_client feeds each GitHub response to
+``limiter.record()`` and asks ``limiter.acquire()`` before each GitHub call:
+
+- while a resource is blocked (Retry-After, or the budget is used up until its
+  reset) calls are deferred: ``acquire`` raises RateLimited without touching
+  GitHub, so callers serve their last-known results;
+- once the remaining budget drops below GITHUB_RATE_LIMIT_RESERVE of the limit,
+  calls are spaced evenly over the time left until reset (search allows 30
+  requests per minute, so a burst of team searches is spread out instead of
+  hitting the wall);
+- a call that would have to wait longer than GITHUB_RATE_LIMIT_MAX_WAIT
+  seconds is deferred rather than blocking a worker thread.
+
+Budget usage is reported by ``GET /api/v1/github/rate-limit`` and /metrics.
+"""
+
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+import metrics
+
+# Longest a GitHub call may be delayed to stay within budget before it is deferred
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.getenv("GITHUB_RATE_LIMIT_MAX_WAIT", "10"))
+# Share of a resource's limit below which calls are spaced evenly until reset
+GITHUB_RATE_LIMIT_RESERVE = float(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "0.2"))
+# Back-off (seconds) after a secondary rate limit that sent no Retry-After (GitHub asks for at least a minute)
+SECONDARY_LIMIT_BACKOFF = 60
+
+
+class RateLimited(Exception):
+    """A GitHub call was deferred (or throttled) to stay within the rate limit."""
+
+    def __init__(self, resource: str, retry_at: Optional[float]):
+        self.resource = resource
+        self.retry_at = retry_at
+        wait = f" for {max(0, retry_at - time.time()):.0f}s" if retry_at else ""
+        super().__init__(f"GitHub {resource} rate limit: deferred{wait}")
+
+
+def resource_for(url: str) -> str:
+    """Rate-limit resource a GitHub API URL counts against."""
+    path = urlsplit(url).path
+    if path.startswith("/search/"):
+        return "search"
+    if path == "/graphql":
+        return "graphql"
+    return "core"
+
+
+def is_throttled(response: requests.Response) -> bool:
+    """Whether a response is a rate-limit rejection (as opposed to e.g. a permissions 403)."""
+    if response.status_code == 429:
+        return True
+    if response.status_code != 403:
+        return False
+    return (
+        response.headers.get("X-RateLimit-Remaining") == "0"
+        or "Retry-After" in response.headers
+        or "rate limit" in response.text.lower()
+    )
+
+
+class ResourceBudget:
+    """Last-known budget of one resource plus how often calls were delayed or deferred."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset_at: Optional[float] = None
+        self.blocked_until: Optional[float] = None
+        self.next_slot = 0.0
+        self.requests = 0
+        self.delayed = 0
+        self.deferred = 0
+        self.throttled = 0
+
+    def _reserve(self) -> int:
+        return math.ceil((self.limit or 0) * GITHUB_RATE_LIMIT_RESERVE)
+
+    def delay(self, now: float) -> float:
+        """Seconds the next call has to wait (``inf`` if it must wait for an unknown time)."""
+        if self.blocked_until is not None and self.blocked_until > now:
+            return self.blocked_until - now
+        if self.remaining is None or self.reset_at is None:
+            return 0.0
+        if self.reset_at <= now:
+            # Window has rolled over; the next response reports the new budget
+            self.remaining = None
+            return 0.0
+        if self.remaining <= 0:
+            return self.reset_at - now
+        if self.remaining > self._reserve():
+            return 0.0
+        return max(0.0, self.next_slot - now)
+
+    def take(self, start: float) -> None:
+        """Claim a call starting at ``start``, advancing the pacing slot when the budget is low."""
+        self.requests += 1
+        if self.remaining is None or self.reset_at is None:
+            return
+        if self.remaining <= self._reserve():
+            self.next_slot = start + (self.reset_at - start) / max(self.remaining, 1)
+        # Optimistic until the response reports the real figure
+        self.remaining -= 1
+
+    def snapshot(self) -> dict:
+        return {
+            "resource": self.name,
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "used": self.limit - self.remaining if self.limit is not None and self.remaining is not None else None,
+            "reset_at": self.reset_at,
+            "blocked_until": self.blocked_until if self.blocked_until and self.blocked_until > time.time() else None,
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "deferred": self.deferred,
+            "throttled": self.throttled,
+        }
+
+
+class RateLimiter:
+    """Thread-safe per-resource budgets for the GitHub API."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._budgets: Dict[str, ResourceBudget] = {
+            name: ResourceBudget(name) for name in ("core", "search", "graphql")
+        }
+
+    def _budget(self, resource: str) -> ResourceBudget:
+        if resource not in self._budgets:
+            self._budgets[resource] = ResourceBudget(resource)
+        return self._budgets[resource]
+
+    def acquire(self, resource: str) -> None:
+        """Wait for this resource's next slot, or raise RateLimited if that is too far off."""
+        with self._lock:
+            budget = self._budget(resource)
+            now = time.time()
+            wait = budget.delay(now)
+            if wait > GITHUB_RATE_LIMIT_MAX_WAIT:
+                budget.deferred += 1
+                raise RateLimited(resource, now + wait)
+            budget.take(now + wait)
+            if wait > 0:
+                budget.delayed += 1
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, resource: str, response: requests.Response) -> None:
+        """Update the budget from a GitHub response's rate-limit headers."""
+        headers = response.headers
+        now = time.time()
+        with self._lock:
+            # The header names the real bucket (e.g. code_search) when it differs from the URL's
+            budget = self._budget(headers.get("X-RateLimit-Resource", resource))
+            limit = headers.get("X-RateLimit-Limit")
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset = headers.get("X-RateLimit-Reset")
+            if limit and limit.isdigit():
+                budget.limit = int(limit)
+            if remaining and remaining.isdigit():
+                budget.remaining = int(remaining)
+            if reset and reset.isdigit():
+                budget.reset_at = float(reset)
+
+            if not is_throttled(response):
+                return
+            budget.throttled += 1
+            retry_after = headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                budget.blocked_until = now + int(retry_after)
+            elif budget.remaining == 0 and budget.reset_at and budget.reset_at > now:
+                budget.blocked_until = budget.reset_at
+            else:
+                budget.blocked_until = now + SECONDARY_LIMIT_BACKOFF
+        print(f"GitHub: {budget.name} rate limit hit, deferring calls for {budget.blocked_until - now:.0f}s")
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [budget.snapshot() for budget in self._budgets.values()]
+
+
+limiter = RateLimiter()
+
+
+def _samples(field: str):
+    return [({"resource": s["resource"]}, s[field]) for s in limiter.snapshot() if s[field] is not None]
+
+
+metrics.register_callback(
+    "github_ratelimit_limit", "GitHub rate limit per window, per resource.", "gauge",
+    lambda: _samples("limit"),
+)
+metrics.register_callback(
+    "github_ratelimit_remaining", "Latest X-RateLimit-Remaining reported by GitHub, per resource.", "gauge",
+    lambda: _samples("remaining"),
+)
+metrics.register_callback(
+    "github_ratelimit_reset_timestamp_seconds", "When the current rate-limit window resets (Unix time).", "gauge",
+    lambda: _samples("reset_at"),
+)
+metrics.register_callback(
+    "github_ratelimit_delayed_total", "GitHub calls delayed to spread the remaining budget.", "counter",
+    lambda: _samples("delayed"),
+)
+metrics.register_callback(
+    "github_ratelimit_deferred_total", "GitHub calls deferred (not sent) to stay within budget.", "counter",
+    lambda: _samples("deferred"),
+)
+metrics.register_callback(
+    "github_ratelimit_throttled_total", "GitHub responses rejected by a rate limit (403/429).", "counter",
+    lambda: _samples("throttled"),
+)
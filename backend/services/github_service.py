@@ -1,25 +1,40 @@
-import requests
 import os
-from typing import List, Set
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Set
 from schemas import GithubPR
+from services import http_client, github_graphql_service
+from services.github_rate_limit import RateLimited, is_throttled
 
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
 GITHUB_API_URL = "https://api.github.com"
+# "rest" (search + per-PR REST calls) or "graphql" (batched GraphQL queries)
+GITHUB_BACKEND = os.getenv("GITHUB_BACKEND", "rest").strip('"\'').lower()
+# Max parallel PR detail lookups in get_my_prs
+GITHUB_DETAIL_CONCURRENCY = int(os.getenv("GITHUB_DETAIL_CONCURRENCY", "8"))
+# Per-PR detail timeout (seconds), so one slow PR cannot stall the whole list
+GITHUB_DETAIL_TIMEOUT = float(os.getenv("GITHUB_DETAIL_TIMEOUT", "10"))
 
-# Cache for user's teams (fetched once at startup)
+# Seconds before the teams list is revalidated (a conditional request, usually a free 304)
+GITHUB_TEAMS_TTL = int(os.getenv("GITHUB_TEAMS_TTL", "3600"))
+
+# Cache for user's teams (revalidated every GITHUB_TEAMS_TTL seconds)
 _user_teams_cache: Set[str] = set()
-_teams_fetched: bool = False
+_teams_fetched_at: float | None = None
+
+# Last successful search items per query, served when a search is throttled or deferred
+_last_search_items: Dict[str, List[dict]] = {}
 
 
 def _get_user_teams() -> Set[str]:
     """Fetch all teams the authenticated user belongs to."""
-    global _user_teams_cache, _teams_fetched
+    global _user_teams_cache, _teams_fetched_at
     
-    if _teams_fetched:
+    if _teams_fetched_at is not None and time.monotonic() - _teams_fetched_at < GITHUB_TEAMS_TTL:
         return _user_teams_cache
     
     if not GITHUB_TOKEN:
-        _teams_fetched = True
+        _teams_fetched_at = time.monotonic()
         return _user_teams_cache
     
     headers = {
@@ -30,10 +45,11 @@ def _get_user_teams() -> Set[str]:
     try:
         # Get all teams the user belongs to across all organizations
         # This endpoint lists all teams for the authenticated user
-        teams_response = requests.get(
+        teams_response = http_client.get(
             f"{GITHUB_API_URL}/user/teams",
             headers=headers,
-            params={"per_page": 100}
+            params={"per_page": 100},
+            conditional=True
         )
         teams_response.raise_for_status()
         
@@ -43,19 +59,58 @@ def _get_user_teams() -> Set[str]:
             team_slug = f"{team['organization']['login']}/{team['slug']}"
             teams.add(team_slug)
         
+        if teams != _user_teams_cache:
+            print(f"GitHub: Found {len(teams)} teams: {teams}")
         _user_teams_cache = teams
-        _teams_fetched = True
-        print(f"GitHub: Found {len(teams)} teams: {teams}")
+        _teams_fetched_at = time.monotonic()
         return teams
         
     except Exception as e:
         print(f"Error fetching user teams: {e}")
+        if _teams_fetched_at is None:
+            # Never fetched: team PRs would silently be missing from the result
+            raise
         # Don't cache failure, so we retry next time
         return _user_teams_cache
 
 
+def _search_items(query: str, headers: dict, **params) -> List[dict]:
+    """Search issues/PRs for one query.
+
+    When GitHub throttles the search (or the rate limiter defers it to stay
+    within budget) the last successful result for the same query is returned,
+    so a throttled chunk keeps its PRs instead of dropping out of the list.
+    """
+    try:
+        response = http_client.get(
+            f"{GITHUB_API_URL}/search/issues",
+            headers=headers,
+            params={"q": query, **params},
+            conditional=True
+        )
+    except RateLimited as e:
+        print(f"{e}; serving last-known results for: {query}")
+        return _last_search_items.get(query, [])
+
+    if is_throttled(response):
+        print(f"GitHub: search rate limited; serving last-known results for: {query}")
+        return _last_search_items.get(query, [])
+    response.raise_for_status()
+
+    items = response.json().get("items", [])
+    _last_search_items[query] = items
+    return items
+
+
 def get_review_requested_prs() -> List[GithubPR]:
-    """Get PRs where review is requested from user or their teams."""
+    """Get PRs where review is requested from user or their teams.
+
+    Upstream failures raise (throttled searches serve their last-known items),
+    so the refresh scheduler keeps serving the previous list.
+    """
+    if GITHUB_BACKEND == "graphql":
+        return github_graphql_service.get_review_requested_prs()
+
     if not GITHUB_TOKEN:
         print("Warning: GITHUB_TOKEN not set")
         return []
@@ -68,29 +123,16 @@ def get_review_requested_prs() -> List[GithubPR]:
     all_prs = {}  # Use dict to deduplicate by URL
     
     # 1. Get PRs with review requested from user directly
-    try:
-        query = "type:pr state:open review-requested:@me"
-        response = requests.get(
-            f"{GITHUB_API_URL}/search/issues",
-            headers=headers,
-            params={"q": query}
-        )
-        if response.status_code == 403 or response.status_code == 429:
-             print(f"Rate limit exceeded fetching personal reviews: {response.text}")
-        else:
-            response.raise_for_status()
-            
-            for item in response.json().get("items", []):
-                pr_url = item["html_url"]
-                if pr_url not in all_prs:
-                    all_prs[pr_url] = _parse_pr_item(item)
-                
-    except Exception as e:
-        print(f"Error fetching personal review requests: {e}")
+    query = "type:pr state:open review-requested:@me"
+    for item in _search_items(query, headers):
+        pr_url = item["html_url"]
+        if pr_url not in all_prs:
+            all_prs[pr_url] = _parse_pr_item(item)
     
     # 2. Get PRs with review requested from user's teams
     # Batch queries to avoid rate limits
-    teams = list(_get_user_teams())
+    # Sorted so each chunk (and its last-known results) stays stable between refreshes
+    teams = sorted(_get_user_teams())
     
     # Process in chunks of 5 teams to keep query length reasonable
     CHUNK_SIZE = 5
@@ -114,30 +156,14 @@ def get_review_requested_prs() -> List[GithubPR]:
         else:
             query = f"type:pr state:open team-review-requested:{chunk[0]}"
             
-        try:
-            print(f"GitHub: Searching team reviews with query: {query}")
-            response = requests.get(
-                f"{GITHUB_API_URL}/search/issues",
-                headers=headers,
-                params={"q": query}
-            )
-            
-            if response.status_code == 403 or response.status_code == 429:
-                 print(f"Rate limit exceeded fetching team reviews (chunk {i}): {response.text}")
-                 continue
-                 
-            response.raise_for_status()
-            
-            items = response.json().get("items", [])
-            print(f"GitHub: Found {len(items)} PRs for team chunk {i}")
-            
-            for item in items:
-                pr_url = item["html_url"]
-                if pr_url not in all_prs:
-                    all_prs[pr_url] = _parse_pr_item(item)
-                    
-        except Exception as e:
-            print(f"Error fetching team review requests for chunk {chunk}: {e}")
+        print(f"GitHub: Searching team reviews with query: {query}")
+        items = _search_items(query, headers)
+        print(f"GitHub: Found {len(items)} PRs for team chunk {i}")
+
+        for item in items:
+            pr_url = item["html_url"]
+            if pr_url not in all_prs:
+                all_prs[pr_url] = _parse_pr_item(item)
     
     # Sort by created_at descending
     prs = list(all_prs.values())
@@ -165,8 +191,33 @@ def _parse_pr_item(item: dict) -> GithubPR:
     )
 
 
+def _fetch_pr_with_detail(item: dict, headers: dict) -> GithubPR:
+    """Parse a search item and enrich it with mergeable info from the PR detail endpoint.
+
+    A failing detail call only leaves this PR's mergeable fields empty.
+    """
+    pr = _parse_pr_item(item)
+    pr_api_url = item["pull_request"]["url"]
+    try:
+        pr_detail_response = http_client.get(pr_api_url, headers=headers, timeout=GITHUB_DETAIL_TIMEOUT, conditional=True)
+        pr_detail_response.raise_for_status()
+        pr_detail = pr_detail_response.json()
+        pr.mergeable = pr_detail.get("mergeable")
+        pr.mergeable_state = pr_detail.get("mergeable_state")
+    except Exception as e:
+        print(f"Error fetching PR detail {pr_api_url}: {e}")
+    return pr
+
+
 def get_my_prs() -> List[GithubPR]:
-    """Get open PRs created by the authenticated user."""
+    """Get open PRs created by the authenticated user.
+
+    A failed search raises so the scheduler keeps the previous list; a failed
+    detail lookup only leaves that PR's mergeable fields empty.
+    """
+    if GITHUB_BACKEND == "graphql":
+        return github_graphql_service.get_my_prs()
+
     if not GITHUB_TOKEN:
         print("Warning: GITHUB_TOKEN not set")
         return []
@@ -176,32 +227,19 @@ def get_my_prs() -> List[GithubPR]:
         "Accept": "application/vnd.github.v3+json"
     }
     
-    try:
-        # Search for open PRs authored by the current user
-        query = "type:pr state:open author:@me"
-        response = requests.get(
-            f"{GITHUB_API_URL}/search/issues",
-            headers=headers,
-            params={"q": query, "sort": "created", "order": "desc"}
-        )
-        response.raise_for_status()
-        items = response.json().get("items", [])
-        
-        prs = []
-        for item in items:
-            # Get detailed PR info including mergeable status
-            pr_api_url = item["pull_request"]["url"]
-            pr_detail_response = requests.get(pr_api_url, headers=headers)
-            pr_detail_response.raise_for_status()
-            pr_detail = pr_detail_response.json()
-            
-            pr = _parse_pr_item(item)
-            pr.mergeable = pr_detail.get("mergeable")
-            pr.mergeable_state = pr_detail.get("mergeable_state")
-            prs.append(pr)
-        
-        return prs
-        
-    except Exception as e:
-        print(f"Error fetching my PRs: {e}")
+    # Search for open PRs authored by the current user
+    query = "type:pr state:open author:@me"
+    items = _search_items(query, headers, sort="created", order="desc")
+
+    if not items:
         return []
+
+    # Fetch detailed PR info (mergeable status) concurrently, preserving search order
+    start = time.perf_counter()
+    workers = max(1, min(GITHUB_DETAIL_CONCURRENCY, len(items)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        prs = list(executor.map(lambda item: _fetch_pr_with_detail(item, headers), items))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    print(f"GitHub: Fetched {len(items)} PR details in {elapsed_ms:.0f}ms (concurrency {workers})")
+
+    return prs
@@ -1,38 +1,272 @@
 import os
-from typing import Optional
-from googleapiclient.discovery import build
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from googleapiclient.errors import HttpError
+from schemas import GmailArrival, GmailLabelCount
+from services.google_clients import borrow_service
 from services.google_auth import get_credentials, CREDENTIALS_PATH, TOKEN_PATH
 
+# "history" (update the count from users.history deltas) or "full" (labels.get on every poll)
+GMAIL_SYNC_MODE = os.getenv("GMAIL_SYNC_MODE", "history").strip('"\'').lower()
+# Re-read the INBOX label every N history polls to correct any drift in the tracked count
+GMAIL_RECONCILE_EVERY = int(os.getenv("GMAIL_RECONCILE_EVERY", "30"))
+# Number of recent inbox arrivals kept in memory
+GMAIL_RECENT_ARRIVALS = 20
+# Labels (ids or names) and search queries to count, comma-separated.
+# Entries containing ":" or a space are Gmail search queries, e.g. "INBOX,Work,is:important"
+GMAIL_COUNT_LABELS = os.getenv("GMAIL_COUNT_LABELS", "INBOX").strip('"\'')
+
+_HISTORY_TYPES = ["messageAdded", "messageDeleted", "labelAdded", "labelRemoved"]
+
+
+class _MailboxState:
+    """Unread INBOX count tracked from Gmail history since a known historyId."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.history_id: Optional[str] = None
+        self.unread = 0
+        self.polls_since_full = 0
+        self.arrivals = deque(maxlen=GMAIL_RECENT_ARRIVALS)
+
+
+_mailbox = _MailboxState()
+
+
+def _read_inbox_unread(service) -> int:
+    # Use labels.get to get the exact unread count for INBOX label
+    # This matches what Gmail shows in the sidebar
+    label_info = service.users().labels().get(
+        userId='me',
+        id='INBOX'
+    ).execute()
+
+    # Get the unread message count directly from the label
+    return label_info.get('messagesUnread', 0)
+
+
+def _is_unread_inbox(labels) -> bool:
+    return 'INBOX' in labels and 'UNREAD' in labels
+
+
+def _history_delta(record: dict, arrivals: List[GmailArrival]) -> int:
+    """Change in unread INBOX messages caused by one history record.
+
+    Each change carries the message's labels after the change; the labels before
+    it are derived from the labels that were added or removed. Unread inbox
+    messages that were added are appended to ``arrivals``.
+    """
+    delta = 0
+    for change in record.get('messagesAdded', []):
+        message = change.get('message', {})
+        if _is_unread_inbox(message.get('labelIds', [])):
+            delta += 1
+            arrivals.append(GmailArrival(
+                id=message['id'],
+                thread_id=message.get('threadId', ''),
+                seen_at=datetime.now(timezone.utc).isoformat()
+            ))
+    for change in record.get('messagesDeleted', []):
+        if _is_unread_inbox(change.get('message', {}).get('labelIds', [])):
+            delta -= 1
+    for change in record.get('labelsAdded', []):
+        after = set(change.get('message', {}).get('labelIds', []))
+        before = after - set(change.get('labelIds', []))
+        delta += _is_unread_inbox(after) - _is_unread_inbox(before)
+    for change in record.get('labelsRemoved', []):
+        after = set(change.get('message', {}).get('labelIds', []))
+        before = after | set(change.get('labelIds', []))
+        delta += _is_unread_inbox(after) - _is_unread_inbox(before)
+    return delta
+
+
+def _record_arrivals(arrivals: List[GmailArrival]) -> None:
+    """Add one poll's arrivals (oldest first) to the recent list, skipping messages already in it."""
+    seen = {arrival.id for arrival in _mailbox.arrivals}
+    for arrival in arrivals:
+        if arrival.id not in seen:
+            seen.add(arrival.id)
+            _mailbox.arrivals.appendleft(arrival)
+
+
+def _full_read(service) -> int:
+    """Read the INBOX unread count and remember the current historyId as the new baseline."""
+    profile = service.users().getProfile(userId='me').execute()
+    _mailbox.unread = _read_inbox_unread(service)
+    _mailbox.history_id = profile.get('historyId')
+    _mailbox.polls_since_full = 0
+    return _mailbox.unread
+
+
+def _poll_history(service) -> int:
+    """Update the tracked unread count from history since the last poll.
+
+    Falls back to a full label read on the first poll, when the stored
+    historyId has expired (404), and every GMAIL_RECONCILE_EVERY polls.
+    Arrivals are only recorded once the poll has completed, so a failed poll
+    that is retried from the same historyId doesn't list them twice.
+    """
+    with _mailbox.lock:
+        if _mailbox.history_id is None or _mailbox.polls_since_full >= GMAIL_RECONCILE_EVERY:
+            return _full_read(service)
+
+        delta = 0
+        arrivals: List[GmailArrival] = []
+        history_id = _mailbox.history_id
+        page_token = None
+        try:
+            while True:
+                result = service.users().history().list(
+                    userId='me',
+                    startHistoryId=_mailbox.history_id,
+                    historyTypes=_HISTORY_TYPES,
+                    pageToken=page_token
+                ).execute()
+                for record in result.get('history', []):
+                    delta += _history_delta(record, arrivals)
+                history_id = result.get('historyId', history_id)
+                page_token = result.get('nextPageToken')
+                if not page_token:
+                    break
+        except HttpError as e:
+            if e.resp.status == 404:
+                print("Gmail history expired. Re-reading INBOX label.")
+                return _full_read(service)
+            raise
+
+        _mailbox.unread = max(0, _mailbox.unread + delta)
+        _mailbox.history_id = history_id
+        _mailbox.polls_since_full += 1
+        _record_arrivals(arrivals)
+        return _mailbox.unread
+
+
+def get_recent_arrivals() -> List[GmailArrival]:
+    """Unread inbox messages seen arriving by history polling, newest first."""
+    # Copying a deque is atomic under the GIL, so no need to wait for a running poll
+    return list(_mailbox.arrivals)
+
+
+def _get_count_entries() -> List[str]:
+    return [entry.strip() for entry in GMAIL_COUNT_LABELS.split(",") if entry.strip()]
+
+
+def _is_query(entry: str) -> bool:
+    return ":" in entry or " " in entry
+
+
+# Label name/id (lowercase) -> label id, for entries configured by name
+_label_ids: Dict[str, str] = {}
+# Entries already looked up in labels.list (so an unknown entry doesn't re-list every poll)
+_label_lookups = set()
+# Last counts returned per entry, served for an entry whose batch part fails
+_last_counts: Dict[str, GmailLabelCount] = {}
+
+
+def _resolve_label_ids(service, entries: List[str]) -> Dict[str, str]:
+    """Map configured label entries to label ids, listing labels only when a name is unknown."""
+    labels = [entry for entry in entries if not _is_query(entry)]
+    if any(entry.lower() not in _label_ids and entry not in _label_lookups for entry in labels):
+        result = service.users().labels().list(userId='me').execute()
+        for label in result.get('labels', []):
+            _label_ids[label['name'].lower()] = label['id']
+            _label_ids[label['id'].lower()] = label['id']
+        _label_lookups.update(labels)
+    # Unknown entries are passed through as ids (e.g. system labels like IMPORTANT)
+    return {entry: _label_ids.get(entry.lower(), entry) for entry in labels}
+
+
+def _batch_counts(service, entries: List[str]) -> Dict[str, dict]:
+    """Run one batch request for every entry; returns responses by request id ("<i>:label", "<i>:total", "<i>:unread")."""
+    label_ids = _resolve_label_ids(service, entries)
+
+    results: Dict[str, dict] = {}
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            print(f"Error fetching Gmail count for {request_id}: {exception}")
+            return
+        results[request_id] = response
+
+    batch = service.new_batch_http_request(callback=on_response)
+    for i, entry in enumerate(entries):
+        if _is_query(entry):
+            batch.add(service.users().messages().list(userId='me', q=entry, maxResults=1), request_id=f"{i}:total")
+            batch.add(service.users().messages().list(userId='me', q=f"{entry} is:unread", maxResults=1), request_id=f"{i}:unread")
+        else:
+            batch.add(service.users().labels().get(userId='me', id=label_ids[entry]), request_id=f"{i}:label")
+    batch.execute()
+    return results
+
+
+def get_label_counts() -> Dict[str, GmailLabelCount]:
+    """Unread/total counts for every GMAIL_COUNT_LABELS entry, fetched in one batch request.
+
+    Labels use labels.get (exact counts); queries use messages.list
+    resultSizeEstimate for "<query>" and "<query> is:unread". An entry whose
+    part of the batch fails keeps its last-known count; failures of the whole
+    call raise, so the refresh scheduler keeps serving the previous counts.
+    """
+    if not os.path.exists(CREDENTIALS_PATH) and not os.path.exists(TOKEN_PATH):
+        print("Google not configured. Returning no label counts.")
+        return {}
+
+    creds = get_credentials()
+    if not creds:
+        raise RuntimeError("Could not get Google credentials")
+
+    entries = _get_count_entries()
+    with borrow_service('gmail', 'v1', creds) as service:
+        results = _batch_counts(service, entries)
+
+    counts = {}
+    for i, entry in enumerate(entries):
+        if _is_query(entry):
+            total = results.get(f"{i}:total")
+            unread = results.get(f"{i}:unread")
+            if total is None or unread is None:
+                if entry in _last_counts:
+                    counts[entry] = _last_counts[entry]
+                continue
+            counts[entry] = GmailLabelCount(
+                unread=unread.get('resultSizeEstimate', 0),
+                total=total.get('resultSizeEstimate', 0),
+                estimated=True
+            )
+        else:
+            label = results.get(f"{i}:label")
+            if label is None:
+                if entry in _last_counts:
+                    counts[entry] = _last_counts[entry]
+                continue
+            counts[entry] = GmailLabelCount(
+                unread=label.get('messagesUnread', 0),
+                total=label.get('messagesTotal', 0)
+            )
+    if entries and not counts:
+        raise RuntimeError("Every Gmail count request failed")
+    _last_counts.clear()
+    _last_counts.update(counts)
+    return counts
+
 
 def get_unread_count() -> int:
-    """Fetch the count of unread emails in the inbox using labels.get API."""
-    
+    """Fetch the count of unread emails in the inbox (raises on upstream or auth failure)."""
+
     # Check if credentials file exists
     if not os.path.exists(CREDENTIALS_PATH) and not os.path.exists(TOKEN_PATH):
         print("Google not configured. Returning 0 unread.")
         return 0
-    
-    try:
-        creds = get_credentials()
-        if not creds:
-            print("Could not get Google credentials. Returning 0 unread.")
-            return 0
-        
-        # Build the Gmail API service
-        service = build('gmail', 'v1', credentials=creds)
-        
-        # Use labels.get to get the exact unread count for INBOX label
-        # This matches what Gmail shows in the sidebar
-        label_info = service.users().labels().get(
-            userId='me',
-            id='INBOX'
-        ).execute()
-        
-        # Get the unread message count directly from the label
-        unread_count = label_info.get('messagesUnread', 0)
-        
-        return unread_count
-        
-    except Exception as e:
-        print(f"Error fetching Gmail unread count: {e}")
-        return 0
+
+    creds = get_credentials()
+    if not creds:
+        raise RuntimeError("Could not get Google credentials")
+
+    # Reuse a pooled Gmail API service for these credentials
+    with borrow_service('gmail', 'v1', creds) as service:
+        if GMAIL_SYNC_MODE == "history":
+            return _poll_history(service)
+
+        return _read_inbox_unread(service)
@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+from datetime import datetime, timedelta
 from typing import Optional
 from enum import Enum
 import json
@@ -8,6 +11,8 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
+import metrics
+from services import http_client
 
 # Shared Google API configuration
 SCOPES = [
@@ -18,6 +23,17 @@ SCOPES = [
 CREDENTIALS_PATH = os.getenv('GOOGLE_CREDENTIALS_PATH', '/app/credentials.json')
 TOKEN_PATH = os.getenv('GOOGLE_TOKEN_PATH', '/app/token.json')
 
+# Refresh the access token in the background this many seconds before it expires
+GOOGLE_REFRESH_MARGIN = int(os.getenv('GOOGLE_REFRESH_MARGIN', '300'))
+
+# In-memory credentials, reloaded only when token.json changes on disk
+_creds_cache: Optional[Credentials] = None
+_creds_mtime: Optional[int] = None
+_creds_lock = threading.Lock()
+# Serializes token refreshes so concurrent callers share a single refresh
+_refresh_lock = threading.Lock()
+_background_refresh: Optional[threading.Thread] = None
+
 
 class AuthStatus(str, Enum):
     """Google OAuth authorization status"""
@@ -26,20 +42,94 @@ class AuthStatus(str, Enum):
     NOT_CONFIGURED = "not_configured"
 
 
+def _token_mtime() -> Optional[int]:
+    try:
+        return os.stat(TOKEN_PATH).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def _remember_credentials(creds: Optional[Credentials]) -> None:
+    """Cache credentials we just wrote so the token file is not re-read."""
+    global _creds_cache, _creds_mtime
+
+    with _creds_lock:
+        _creds_cache = creds
+        _creds_mtime = _token_mtime() if creds is not None else None
+
+
+def _load_cached_credentials() -> Optional[Credentials]:
+    """Return credentials from memory, re-reading token.json only when it changed on disk."""
+    global _creds_cache, _creds_mtime
+
+    mtime = _token_mtime()
+    with _creds_lock:
+        if mtime is None:
+            _creds_cache = None
+            _creds_mtime = None
+        elif _creds_cache is None or mtime != _creds_mtime:
+            _creds_cache = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+            _creds_mtime = mtime
+        return _creds_cache
+
+
+def _expiring_soon(creds: Credentials) -> bool:
+    if not creds.expiry:
+        return False
+    return creds.expiry - datetime.utcnow() < timedelta(seconds=GOOGLE_REFRESH_MARGIN)
+
+
+def _refresh_credentials(creds: Credentials) -> None:
+    """Refresh and persist the token, single-flight.
+
+    Callers that arrive while a refresh is running wait for it and then find the
+    credentials already fresh, so only one OAuth round trip and one write happen.
+    """
+    with _refresh_lock:
+        if creds.valid and not _expiring_soon(creds):
+            return
+        start = time.perf_counter()
+        try:
+            creds.refresh(Request(session=http_client.get_session()))
+        except Exception as e:
+            metrics.observe_upstream("google_oauth", time.perf_counter() - start, error=e)
+            raise
+        metrics.observe_upstream("google_oauth", time.perf_counter() - start)
+        # Persist refreshed token
+        save_credentials(creds)
+
+
+def _refresh_in_background(creds: Credentials) -> None:
+    """Start a background refresh ahead of expiry, unless one is already running."""
+    global _background_refresh
+
+    def run():
+        try:
+            _refresh_credentials(creds)
+        except Exception as e:
+            print(f"Background token refresh failed: {e}")
+
+    with _creds_lock:
+        if _background_refresh is not None and _background_refresh.is_alive():
+            return
+        _background_refresh = threading.Thread(target=run, name="google-token-refresh", daemon=True)
+        _background_refresh.start()
+
+
 def get_auth_status() -> AuthStatus:
     """Check current Google authorization, attempting a silent refresh if possible."""
     if not os.path.exists(TOKEN_PATH):
         return AuthStatus.NOT_CONFIGURED
 
     try:
-        creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+        creds = _load_cached_credentials()
         if creds and creds.valid:
+            if _expiring_soon(creds):
+                _refresh_in_background(creds)
             return AuthStatus.AUTHORIZED
         if creds and creds.expired and creds.refresh_token:
             try:
-                creds.refresh(Request())
-                # Persist refreshed token
-                save_credentials(creds)
+                _refresh_credentials(creds)
                 return AuthStatus.AUTHORIZED
             except Exception as refresh_err:
                 print(f"Auth status refresh failed: {refresh_err}")
@@ -126,6 +216,9 @@ def save_credentials(credentials) -> bool:
                 "scopes": credentials.scopes,
                 "type": "authorized_user",
             }
+            # Keep the expiry so loaded credentials know when to refresh ahead of time
+            if credentials.expiry:
+                data["expiry"] = credentials.expiry.isoformat() + "Z"
         elif isinstance(credentials, dict):
             # Ensure required fields present
             data = {
@@ -153,6 +246,8 @@ def save_credentials(credentials) -> bool:
         with open(TOKEN_PATH, 'w') as token_file:
             json.dump(data, token_file)
 
+        # Keep the in-memory copy in sync with what was written
+        _remember_credentials(credentials if isinstance(credentials, Credentials) else None)
         return True
     except Exception as e:
         print(f"Error saving credentials: {e}")
@@ -160,41 +255,51 @@ def save_credentials(credentials) -> bool:
 
 
 def get_credentials() -> Optional[Credentials]:
-    """Get or refresh Google API credentials. Shared by all Google services."""
+    """Get or refresh Google API credentials. Shared by all Google services.
+
+    Credentials are served from memory; an access token close to expiry is
+    refreshed in the background, an expired one is refreshed once (single-flight).
+    """
     creds = None
     
     # Check if token.json exists (saved authorization)
     if os.path.exists(TOKEN_PATH):
         try:
-            creds = Credentials.from_authorized_user_file(TOKEN_PATH, SCOPES)
+            creds = _load_cached_credentials()
         except Exception as e:
             print(f"Error loading token.json: {e}")
             creds = None
     
+    if creds and creds.valid:
+        if _expiring_soon(creds):
+            _refresh_in_background(creds)
+        return creds
+    
     # If no valid credentials, try to get new ones
-    if not creds or not creds.valid:
-        if creds and creds.expired and creds.refresh_token:
+    if creds and creds.expired and creds.refresh_token:
+        try:
+            # Refreshes and saves the token
+            _refresh_credentials(creds)
+            return creds
+        except Exception as e:
+            print(f"Error refreshing credentials: {e}")
+            creds = None
+    
+    # If still no creds, need to run OAuth flow
+    if not creds:
+        if os.path.exists(CREDENTIALS_PATH):
             try:
-                creds.refresh(Request())
+                flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
+                creds = flow.run_local_server(port=0)
             except Exception as e:
-                print(f"Error refreshing credentials: {e}")
-                creds = None
-        
-        # If still no creds, need to run OAuth flow
-        if not creds:
-            if os.path.exists(CREDENTIALS_PATH):
-                try:
-                    flow = InstalledAppFlow.from_client_secrets_file(CREDENTIALS_PATH, SCOPES)
-                    creds = flow.run_local_server(port=0)
-                except Exception as e:
-                    print(f"Error running OAuth flow: {e}")
-                    return None
-            else:
-                print(f"credentials.json not found at {CREDENTIALS_PATH}")
+                print(f"Error running OAuth flow: {e}")
                 return None
-        
-        # Save the credentials for future use
-        if creds:
-            save_credentials(creds)
+        else:
+            print(f"credentials.json not found at {CREDENTIALS_PATH}")
+            return None
+    
+    # Save the credentials for future use
+    if creds:
+        save_credentials(creds)
     
     return creds
@@ -0,0 +1,115 @@
+"""
+Pool of built Google API service objects (Calendar, Gmail).
+
+googleapiclient.discovery.build() loads and parses the discovery document and
+creates a new HTTP transport every time it is called. Built services are kept
+in a small lock-protected pool per API and reused, each with its own
+keep-alive httplib2 transport.
+
+httplib2 transports are not thread-safe, so a service is borrowed for the
+duration of one unit of work (``with borrow_service(...) as service``) and
+returned afterwards; concurrent callers get separate services. At most
+GOOGLE_SERVICE_POOL_SIZE idle services are kept per API, independent of which
+threads come and go. A service is rebuilt only when the credentials change
+(different client or refresh token, i.e. a re-authorization); a refreshed
+access token on the same authorization is handed to the service's
+AuthorizedHttp on checkout.
+
+Each transport times its HTTP calls into the upstream metrics
+(``google_calendar``, ``google_gmail``).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Tuple
+
+import google_auth_httplib2
+import httplib2
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+import metrics
+
+# Socket timeout (seconds) for Google API transports
+GOOGLE_HTTP_TIMEOUT = float(os.getenv("GOOGLE_HTTP_TIMEOUT", "15"))
+# Idle built services kept per API
+GOOGLE_SERVICE_POOL_SIZE = int(os.getenv("GOOGLE_SERVICE_POOL_SIZE", "4"))
+
+
+class _TimedHttp(httplib2.Http):
+    """httplib2 transport that records each call's latency and failures."""
+
+    def __init__(self, upstream: str, **kwargs):
+        super().__init__(**kwargs)
+        self.upstream = upstream
+
+    def request(self, uri, method="GET", *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response, content = super().request(uri, method, *args, **kwargs)
+        except Exception as e:
+            metrics.observe_upstream(self.upstream, time.perf_counter() - start, error=e)
+            raise
+        metrics.observe_upstream(self.upstream, time.perf_counter() - start, status=response.status)
+        return response, content
+
+
+def _fingerprint(creds: Credentials) -> Tuple[Any, ...]:
+    return (creds.client_id, creds.refresh_token)
+
+
+class _PooledService:
+    """A built service plus the AuthorizedHttp it was built with."""
+
+    __slots__ = ("fingerprint", "service", "http")
+
+    def __init__(self, fingerprint: Tuple[Any, ...], service: Any, http: google_auth_httplib2.AuthorizedHttp):
+        self.fingerprint = fingerprint
+        self.service = service
+        self.http = http
+
+
+_idle: Dict[Tuple[str, str], Deque[_PooledService]] = {}
+_pool_lock = threading.Lock()
+
+
+def _build(api: str, version: str, creds: Credentials) -> _PooledService:
+    authed_http = google_auth_httplib2.AuthorizedHttp(
+        creds, http=_TimedHttp(f"google_{api}", timeout=GOOGLE_HTTP_TIMEOUT)
+    )
+    service = build(api, version, http=authed_http, cache_discovery=False)
+    return _PooledService(_fingerprint(creds), service, authed_http)
+
+
+def _checkout(api: str, version: str, creds: Credentials) -> _PooledService:
+    fingerprint = _fingerprint(creds)
+    with _pool_lock:
+        idle = _idle.setdefault((api, version), deque())
+        while idle:
+            pooled = idle.pop()
+            if pooled.fingerprint == fingerprint:
+                # Same authorization: make sure the transport uses the latest token
+                pooled.http.credentials = creds
+                return pooled
+            # Built for an earlier authorization; drop it
+    return _build(api, version, creds)
+
+
+def _checkin(api: str, version: str, pooled: _PooledService) -> None:
+    with _pool_lock:
+        idle = _idle.setdefault((api, version), deque())
+        if len(idle) < GOOGLE_SERVICE_POOL_SIZE:
+            idle.append(pooled)
+
+
+@contextmanager
+def borrow_service(api: str, version: str, creds: Credentials) -> Iterator[Any]:
+    """Lend a built service for exclusive use inside the ``with`` block, then return it to the pool."""
+    pooled = _checkout(api, version, creds)
+    try:
+        yield pooled.service
+    finally:
+        _checkin(api, version, pooled)
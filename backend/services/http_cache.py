@@ -0,0 +1,97 @@
+"""
+Conditional-request (ETag / Last-Modified) response cache.
+
+Stores the last 200 response per URL+params together with its validators.
+The next request for the same key sends If-None-Match / If-Modified-Since;
+when the upstream answers 304 Not Modified the cached response is served
+instead. On GitHub, 304 responses do not count against the rate limit.
+
+Bounded in size with LRU eviction.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import requests
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+
+def make_key(url: str, params: Optional[dict] = None) -> CacheKey:
+    """Build a cache key from the URL and (order-independent) query params."""
+    items = tuple(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    return url, items
+
+
+class ConditionalCache:
+    """Thread-safe LRU of responses carrying ETag/Last-Modified validators."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, requests.Response]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def conditional_headers(self, key: CacheKey) -> Dict[str, str]:
+        """Validator headers to send for this key (empty if nothing is cached)."""
+        with self._lock:
+            cached = self._entries.get(key)
+        if cached is None:
+            return {}
+
+        headers = {}
+        etag = cached.headers.get("ETag")
+        last_modified = cached.headers.get("Last-Modified")
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def resolve(self, key: CacheKey, response: requests.Response) -> Optional[requests.Response]:
+        """Serve the cached body on 304, store fresh 200s, and count hits/misses.
+
+        Returns None for a 304 with no cached entry (evicted since the validators
+        were sent); the caller has to repeat the request without validators.
+        """
+        with self._lock:
+            if response.status_code == 304:
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return cached
+                self.misses += 1
+                return None
+
+            self.misses += 1
+            if response.status_code == 200 and (
+                response.headers.get("ETag") or response.headers.get("Last-Modified")
+            ):
+                # Read the body now so the cached response is reusable across threads
+                _ = response.content
+                self._entries[key] = response
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            return response
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,163 @@
+"""
+Shared HTTP client for upstream API calls (GitHub, Jira).
+
+A single long-lived requests.Session keeps one urllib3 connection pool per host,
+so repeated calls to api.github.com or the Atlassian domains reuse open
+keep-alive connections instead of paying a TCP+TLS handshake every time.
+
+The session is thread-safe for concurrent requests, so async routes can use it
+through the threadpool (starlette.concurrency.run_in_threadpool).
+
+This is deliberately a sync client rather than an async one (e.g.
+httpx.AsyncClient): every upstream caller is synchronous. The refresh
+scheduler runs fetchers in the threadpool, async routes reach upstreams only
+through the scheduler or run_in_threadpool, and the Google API client is
+httplib2-based. An
+async client would need an event loop in each of those threads, or a second
+client beside this one with its own pools. Connection reuse, the point of the
+shared client, comes from the pooled session either way.
+
+GET requests can opt into conditional requests (conditional=True): validators
+from the previous response are sent and a 304 serves the cached body
+(see http_cache).
+
+Every request is timed into the upstream metrics, labelled by what it calls
+(``github_search``, ``github_pr_detail``, ``jira:<domain>``, ...). GitHub calls
+go through the per-resource rate-limit budget (see github_rate_limit): they
+may be spaced out or deferred with RateLimited before anything is sent.
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from services.github_rate_limit import limiter as github_limiter, resource_for
+from services.http_cache import ConditionalCache, make_key
+
+# Number of per-host pools kept alive (one per distinct upstream host)
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "10"))
+# Maximum open connections kept per host
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "20"))
+# Default timeout (seconds) applied when the caller does not pass one
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+# Maximum responses kept for ETag / Last-Modified revalidation
+HTTP_CACHE_MAX_ENTRIES = int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "512"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+response_cache = ConditionalCache(max_entries=HTTP_CACHE_MAX_ENTRIES)
+
+metrics.register_callback(
+    "http_cache_hits_total", "Upstream 304s answered from the conditional-request cache.", "counter",
+    lambda: [({}, response_cache.stats()["hits"])],
+)
+metrics.register_callback(
+    "http_cache_misses_total", "Upstream requests the conditional-request cache could not answer.", "counter",
+    lambda: [({}, response_cache.stats()["misses"])],
+)
+metrics.register_callback(
+    "http_cache_hit_ratio", "Share of conditional upstream requests answered from the cache.", "gauge",
+    lambda: [({}, response_cache.stats()["hit_ratio"])],
+)
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        # Block instead of opening throwaway connections when the pool is exhausted
+        pool_block=True,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use."""
+    global _session
+
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def upstream_name(url: str) -> str:
+    """Metrics label for a request URL."""
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if host == "api.github.com":
+        if parts.path.startswith("/search/"):
+            return "github_search"
+        if parts.path == "/graphql":
+            return "github_graphql"
+        if "/pulls/" in parts.path:
+            return "github_pr_detail"
+        return "github"
+    if parts.path.startswith("/rest/api/"):
+        return f"jira:{host}"
+    return host
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the shared session with the default timeout."""
+    kwargs.setdefault("timeout", HTTP_TIMEOUT)
+    upstream = upstream_name(url)
+    github_resource = resource_for(url) if upstream.startswith("github") else None
+    if github_resource:
+        github_limiter.acquire(github_resource)
+    start = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except Exception as e:
+        metrics.observe_upstream(upstream, time.perf_counter() - start, error=e)
+        raise
+    metrics.observe_upstream(upstream, time.perf_counter() - start, status=response.status_code)
+    if github_resource:
+        github_limiter.record(github_resource, response)
+    return response
+
+
+def get(url: str, conditional: bool = False, **kwargs) -> requests.Response:
+    """GET through the shared session.
+
+    With conditional=True, previously seen ETag/Last-Modified validators are sent
+    and a 304 Not Modified returns the cached 200 response. A 304 the cache can
+    no longer answer is retried once without validators.
+    """
+    if not conditional:
+        return request("GET", url, **kwargs)
+
+    key = make_key(url, kwargs.get("params"))
+    base_headers = kwargs.pop("headers", None) or {}
+    validators = response_cache.conditional_headers(key)
+    response = request("GET", url, headers={**base_headers, **validators}, **kwargs)
+    resolved = response_cache.resolve(key, response)
+    if resolved is None:
+        response = request("GET", url, headers=base_headers, **kwargs)
+        resolved = response_cache.resolve(key, response) or response
+    return resolved
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def close_session() -> None:
+    """Close pooled connections (called on application shutdown)."""
+    global _session
+
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -1,8 +1,16 @@
 import requests
+import hashlib
+import math
 import os
-from typing import List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+import models
+from database import SessionLocal
 from schemas import JiraIssue
 from requests.auth import HTTPBasicAuth
+from services import http_client
 
 # Support comma-separated domains: "domain1.atlassian.net,domain2.atlassian.net"
 # Parse comma-separated domains and strip quotes
@@ -10,77 +18,370 @@ JIRA_DOMAINS = os.getenv("JIRA_DOMAINS", os.getenv("JIRA_DOMAIN", "")).strip('"\
 JIRA_EMAIL = os.getenv("JIRA_EMAIL", "").strip('"\'')
 JIRA_API_TOKEN = os.getenv("JIRA_API_TOKEN", "").strip('"\'')
 
-def get_my_tasks() -> List[JiraIssue]:
-    if not (JIRA_DOMAINS and JIRA_EMAIL and JIRA_API_TOKEN):
-        return []
+# Timeout (seconds) for each Jira HTTP call
+JIRA_TIMEOUT = float(os.getenv("JIRA_TIMEOUT", "10"))
+# Total time budget (seconds) per domain; pagination stops with partial results past it
+JIRA_DOMAIN_TIMEOUT = float(os.getenv("JIRA_DOMAIN_TIMEOUT", "30"))
+# Issues per page (Jira Cloud caps this at 100) and maximum pages per domain
+JIRA_PAGE_SIZE = 100
+JIRA_MAX_PAGES = int(os.getenv("JIRA_MAX_PAGES", "20"))
+
+# "incremental" (local issue store + updated-since deltas) or "full" (re-download every refresh)
+JIRA_SYNC_MODE = os.getenv("JIRA_SYNC_MODE", "incremental").strip('"\'').lower()
+# Seconds between full resyncs in incremental mode (also drops issues deleted in Jira)
+JIRA_FULL_SYNC_INTERVAL = int(os.getenv("JIRA_FULL_SYNC_INTERVAL", "21600"))
+# Extra minutes added to every delta window to absorb clock skew between us and Jira
+JIRA_SYNC_OVERLAP_MINUTES = 2
+
+# Default Jira priority names -> rank (lower is more important), matching the default priority ids
+PRIORITY_RANKS = {
+    "highest": 1, "blocker": 1,
+    "high": 2, "critical": 2,
+    "medium": 3, "major": 3,
+    "low": 4, "minor": 4,
+    "lowest": 5, "trivial": 5,
+}
+
+# (priority rank, -updated timestamp) - the JQL's "priority DESC, updated DESC" across domains
+SortKey = Tuple[int, float]
+
+
+def _get_domains() -> List[str]:
+    return [d.strip() for d in JIRA_DOMAINS.split(",") if d.strip()]
 
-    # Parse comma-separated domains
-    domains = [d.strip() for d in JIRA_DOMAINS.split(",") if d.strip()]
-    
-    auth = HTTPBasicAuth(JIRA_EMAIL, JIRA_API_TOKEN)
-    headers = {"Accept": "application/json"}
 
+def _get_statuses() -> List[str]:
     # Read status filter and strip potential quotes
     status_env = os.getenv("JIRA_TASK_STATUS_ENABLED", "In Progress").strip('"\'')
-    statuses = [f'"{s.strip()}"' for s in status_env.split(",") if s.strip()]
-    status_str = ",".join(statuses) if statuses else '"In Progress"'
+    statuses = [s.strip() for s in status_env.split(",") if s.strip()]
+    return statuses or ["In Progress"]
 
+
+def _get_project_keys() -> List[str]:
     # Optional: restrict to specific project keys (e.g. ECAP) when set
     project_keys_env = os.getenv("JIRA_PROJECT_KEYS", "").strip('"\'')
+    return [k.strip() for k in project_keys_env.split(",") if k.strip()]
+
+
+def _build_jql() -> str:
+    status_str = ",".join(f'"{s}"' for s in _get_statuses())
+
     project_filter = ""
-    if project_keys_env:
-        keys = [k.strip() for k in project_keys_env.split(",") if k.strip()]
-        if keys:
-            keys_quoted = [f'"{k}"' for k in keys]
-            project_filter = f" AND project in ({','.join(keys_quoted)})"
+    keys = _get_project_keys()
+    if keys:
+        keys_quoted = [f'"{k}"' for k in keys]
+        project_filter = f" AND project in ({','.join(keys_quoted)})"
+
+    return f"assignee = currentUser() AND status in ({status_str}){project_filter} ORDER BY priority DESC, updated DESC"
+
+
+def _priority_rank(prio_obj: dict | None) -> int:
+    """Rank a priority by its name, falling back to its numeric id for custom schemes."""
+    if not prio_obj:
+        return 99
+    name = (prio_obj.get("name") or "").lower()
+    if name in PRIORITY_RANKS:
+        return PRIORITY_RANKS[name]
+    prio_id = str(prio_obj.get("id", ""))
+    return int(prio_id) if prio_id.isdigit() else 99
+
+
+def _updated_timestamp(value: str | None) -> float:
+    """Parse Jira's "2024-01-31T10:00:00.000+0000" format into a POSIX timestamp."""
+    if not value:
+        return 0.0
+    try:
+        return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z").timestamp()
+    except ValueError:
+        return 0.0
+
 
-    jql = f"assignee = currentUser() AND status in ({status_str}){project_filter} ORDER BY priority DESC, updated DESC"
+def _issue_fields(item: dict, domain: str) -> dict:
+    """Flatten a Jira search result into the columns of a JiraIssueRecord."""
+    fields = item.get("fields") or {}
 
+    prio_obj = fields.get("priority")
+    priority = prio_obj.get("name", "Unknown") if prio_obj else "Unknown"
+
+    status_obj = fields.get("status")
+    status = status_obj.get("name", "Unknown") if status_obj else "Unknown"
+
+    assignee_obj = fields.get("assignee")
+    assignee_name = assignee_obj.get("displayName", "Unassigned") if assignee_obj else "Unassigned"
+
+    return {
+        "key": item["key"],
+        "summary": fields.get("summary", ""),
+        "status": status,
+        "priority": priority,
+        "priority_rank": _priority_rank(prio_obj),
+        "assignee": assignee_name,
+        "url": f"https://{domain}/browse/{item['key']}",
+        "updated": _updated_timestamp(fields.get("updated")),
+    }
+
+
+def _to_issue(data) -> JiraIssue:
+    """Build the API schema from issue fields (a dict from _issue_fields or a JiraIssueRecord)."""
+    get = data.get if isinstance(data, dict) else lambda name: getattr(data, name)
+    return JiraIssue(
+        key=get("key"),
+        summary=get("summary") or "",
+        status=get("status"),
+        priority=get("priority"),
+        assignee=get("assignee"),
+        url=get("url")
+    )
+
+
+def _parse_issue(item: dict, domain: str) -> Tuple[SortKey, JiraIssue]:
+    data = _issue_fields(item, domain)
+    return (data["priority_rank"], -data["updated"]), _to_issue(data)
+
+
+def _search_domain(domain: str, jql: str, auth: HTTPBasicAuth) -> List[dict]:
+    """Run a JQL search on one domain, following nextPageToken until the last page.
+
+    Stops early (keeping what was fetched) when the domain exceeds JIRA_DOMAIN_TIMEOUT.
+    An issue updated mid-pagination can show up on two pages; it is returned once,
+    with the fields from the later page.
+    """
+    # Jira Cloud API v3: GET /rest/api/3/search/jql (legacy /rest/api/3/search returns 410)
+    url = f"https://{domain}/rest/api/3/search/jql"
+    headers = {"Accept": "application/json"}
     params = {
         "jql": jql,
-        "fields": "summary,status,priority,assignee"
+        "fields": "summary,status,priority,assignee,updated",
+        "maxResults": JIRA_PAGE_SIZE,
     }
 
-    all_issues = []
-    
-    # Jira Cloud API v3: GET /rest/api/3/search/jql (legacy /rest/api/3/search returns 410)
-    for domain in domains:
-        try:
-            url = f"https://{domain}/rest/api/3/search/jql"
-            params_with_max = {**params, "maxResults": 100}
-            response = requests.get(url, headers=headers, params=params_with_max, auth=auth)
-            response.raise_for_status()
-            data = response.json()
-            
-            for item in data.get("issues", []):
-                fields = item.get("fields") or {}
-                
-                prio_obj = fields.get("priority")
-                priority = prio_obj.get("name", "Unknown") if prio_obj else "Unknown"
-                
-                status_obj = fields.get("status")
-                status = status_obj.get("name", "Unknown") if status_obj else "Unknown"
-                
-                assignee_obj = fields.get("assignee")
-                assignee_name = assignee_obj.get("displayName", "Unassigned") if assignee_obj else "Unassigned"
-                
-                all_issues.append(JiraIssue(
-                    key=item["key"],
-                    summary=fields.get("summary", ""),
-                    status=status,
-                    priority=priority,
-                    assignee=assignee_name,
-                    url=f"https://{domain}/browse/{item['key']}"
-                ))
-                
-        except requests.RequestException as e:
-            # Log so you can see if one domain (e.g. ECAP board domain) fails
-            print(f"[Jira] Error fetching from {domain}: {e}")
-            if hasattr(e, "response") and e.response is not None:
-                print(f"[Jira] Response status: {e.response.status_code}, body: {e.response.text[:200]}")
-            continue
-        except Exception as e:
-            print(f"[Jira] Unexpected error from {domain}: {e}")
-            continue
-    
-    return all_issues
+    items: Dict[str, dict] = {}
+    start = time.monotonic()
+    for page in range(JIRA_MAX_PAGES):
+        response = http_client.get(url, headers=headers, params=params, auth=auth, timeout=JIRA_TIMEOUT, conditional=True)
+        response.raise_for_status()
+        data = response.json()
+        for issue in data.get("issues", []):
+            items[issue["key"]] = issue
+
+        next_token = data.get("nextPageToken")
+        if data.get("isLast", True) or not next_token:
+            break
+        if time.monotonic() - start > JIRA_DOMAIN_TIMEOUT:
+            print(f"[Jira] {domain}: time budget exceeded after {page + 1} pages, returning partial results")
+            break
+        params = {**params, "nextPageToken": next_token}
+
+    return list(items.values())
+
+
+def _log_domain_error(domain: str, e: Exception) -> None:
+    if isinstance(e, requests.RequestException):
+        # Log so you can see if one domain (e.g. ECAP board domain) fails
+        print(f"[Jira] Error fetching from {domain}: {e}")
+        if hasattr(e, "response") and e.response is not None:
+            print(f"[Jira] Response status: {e.response.status_code}, body: {e.response.text[:200]}")
+    else:
+        print(f"[Jira] Unexpected error from {domain}: {e}")
+
+
+# Last successful results per domain (full mode), served while that domain is failing
+_last_domain_results: Dict[str, List[Tuple[SortKey, JiraIssue]]] = {}
+
+
+def _fetch_domain(domain: str, jql: str, auth: HTTPBasicAuth) -> List[Tuple[SortKey, JiraIssue]]:
+    """Fetch and parse one domain's issues.
+
+    On failure the domain's last successful results are served; a domain that
+    has never succeeded raises, so the refresh fails instead of reporting no issues.
+    """
+    try:
+        results = [_parse_issue(item, domain) for item in _search_domain(domain, jql, auth)]
+    except Exception as e:
+        _log_domain_error(domain, e)
+        if domain not in _last_domain_results:
+            raise
+        return _last_domain_results[domain]
+    _last_domain_results[domain] = results
+    return results
+
+
+# =============================================================================
+# INCREMENTAL SYNC
+# =============================================================================
+
+def _get_account_id(domain: str, auth: HTTPBasicAuth) -> Optional[str]:
+    response = http_client.get(
+        f"https://{domain}/rest/api/3/myself",
+        headers={"Accept": "application/json"},
+        auth=auth,
+        timeout=JIRA_TIMEOUT,
+        conditional=True
+    )
+    response.raise_for_status()
+    return response.json().get("accountId")
+
+
+def _matches_filter(item: dict, account_id: Optional[str], statuses: Set[str], project_keys: Set[str]) -> bool:
+    """Evaluate the task JQL filter locally, to spot issues that left it."""
+    fields = item.get("fields") or {}
+    assignee_obj = fields.get("assignee") or {}
+    if not account_id or assignee_obj.get("accountId") != account_id:
+        return False
+    status = ((fields.get("status") or {}).get("name") or "").lower()
+    if status not in statuses:
+        return False
+    if project_keys and item["key"].split("-")[0].upper() not in project_keys:
+        return False
+    return True
+
+
+def _sync_domain(domain: str, auth: HTTPBasicAuth) -> None:
+    """Bring one domain's local issue store up to date.
+
+    The first sync (and one every JIRA_FULL_SYNC_INTERVAL, or whenever the filter
+    changes) downloads every matching issue. In between, only issues updated since
+    the last sync are fetched - including ones that were reassigned away or moved
+    out of the status/project filter, which are then dropped from the store.
+    """
+    sync_start = time.time()
+    jql = _build_jql()
+    filter_hash = hashlib.sha1(jql.encode()).hexdigest()
+
+    db = SessionLocal()
+    try:
+        state = db.get(models.JiraSyncState, domain)
+        if state is None:
+            state = models.JiraSyncState(domain=domain)
+            db.add(state)
+        if not state.account_id:
+            state.account_id = _get_account_id(domain, auth)
+
+        needs_full = (
+            state.filter_hash != filter_hash
+            or state.last_sync is None
+            or state.last_full_sync is None
+            or sync_start - state.last_full_sync > JIRA_FULL_SYNC_INTERVAL
+        )
+
+        if needs_full:
+            items = _search_domain(domain, jql, auth)
+            db.query(models.JiraIssueRecord).filter(
+                models.JiraIssueRecord.domain == domain
+            ).delete(synchronize_session=False)
+            db.add_all([models.JiraIssueRecord(domain=domain, **_issue_fields(item, domain)) for item in items])
+            state.filter_hash = filter_hash
+            state.last_full_sync = sync_start
+            print(f"[Jira] {domain}: full sync stored {len(items)} issues")
+        else:
+            minutes = math.ceil((sync_start - state.last_sync) / 60) + JIRA_SYNC_OVERLAP_MINUTES
+            delta_jql = (
+                f'(assignee = currentUser() OR assignee WAS currentUser()) '
+                f'AND updated >= "-{minutes}m" ORDER BY updated DESC'
+            )
+            items = _search_domain(domain, delta_jql, auth)
+
+            statuses = {s.lower() for s in _get_statuses()}
+            project_keys = {k.upper() for k in _get_project_keys()}
+            keys = [item["key"] for item in items]
+            existing = {}
+            if keys:
+                existing = {
+                    record.key: record
+                    for record in db.query(models.JiraIssueRecord).filter(
+                        models.JiraIssueRecord.domain == domain,
+                        models.JiraIssueRecord.key.in_(keys)
+                    )
+                }
+
+            upserted = removed = 0
+            for item in items:
+                record = existing.get(item["key"])
+                if _matches_filter(item, state.account_id, statuses, project_keys):
+                    data = _issue_fields(item, domain)
+                    if record is None:
+                        record = models.JiraIssueRecord(domain=domain, **data)
+                        db.add(record)
+                        existing[item["key"]] = record
+                    else:
+                        for name, value in data.items():
+                            setattr(record, name, value)
+                    upserted += 1
+                elif record is not None:
+                    db.delete(record)
+                    del existing[item["key"]]
+                    removed += 1
+            if items:
+                print(f"[Jira] {domain}: delta sync ({len(items)} changed) upserted {upserted}, removed {removed}")
+
+        state.last_sync = sync_start
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def _has_synced(domain: str) -> bool:
+    db = SessionLocal()
+    try:
+        state = db.get(models.JiraSyncState, domain)
+        return state is not None and state.last_sync is not None
+    finally:
+        db.close()
+
+
+def _sync_domain_safe(domain: str, auth: HTTPBasicAuth) -> None:
+    """Sync one domain; on failure the store keeps serving its last synced issues.
+
+    A domain that has never synced re-raises, since the store has nothing to serve.
+    """
+    try:
+        _sync_domain(domain, auth)
+    except Exception as e:
+        _log_domain_error(domain, e)
+        if not _has_synced(domain):
+            raise
+
+
+def _get_tasks_incremental(domains: List[str], auth: HTTPBasicAuth) -> List[JiraIssue]:
+    with ThreadPoolExecutor(max_workers=len(domains)) as executor:
+        list(executor.map(lambda domain: _sync_domain_safe(domain, auth), domains))
+
+    db = SessionLocal()
+    try:
+        records = db.query(models.JiraIssueRecord).filter(
+            models.JiraIssueRecord.domain.in_(domains)
+        ).order_by(
+            models.JiraIssueRecord.priority_rank,
+            models.JiraIssueRecord.updated.desc()
+        ).all()
+        return [_to_issue(record) for record in records]
+    finally:
+        db.close()
+
+
+def get_my_tasks() -> List[JiraIssue]:
+    if not (JIRA_DOMAINS and JIRA_EMAIL and JIRA_API_TOKEN):
+        return []
+
+    domains = _get_domains()
+    if not domains:
+        return []
+
+    auth = HTTPBasicAuth(JIRA_EMAIL, JIRA_API_TOKEN)
+
+    if JIRA_SYNC_MODE == "incremental":
+        return _get_tasks_incremental(domains, auth)
+
+    jql = _build_jql()
+
+    # Query all domains concurrently; latency is the slowest domain, not the sum
+    with ThreadPoolExecutor(max_workers=len(domains)) as executor:
+        per_domain = list(executor.map(lambda domain: _fetch_domain(domain, jql, auth), domains))
+
+    # Merge in the JQL's priority/updated order (stable, so ties keep domain order)
+    merged = [entry for results in per_domain for entry in results]
+    merged.sort(key=lambda entry: entry[0])
+    return [issue for _, issue in merged]
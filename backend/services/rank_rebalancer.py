@@ -0,0 +1,58 @@
+"""
+Background rebalancing of todo rank keys (TODO_ORDERING=rank).
+
+Inserting repeatedly at the same spot makes rank keys grow by about one
+character per move. A daemon thread periodically checks the longest key and
+rewrites all keys to short evenly spaced ones in one set-based UPDATE when it
+exceeds TODO_RANK_MAX_LENGTH. It also backfills ranks for todos created under
+TODO_ORDERING=position, so switching modes keeps the existing order.
+"""
+
+import os
+import threading
+
+import crud
+from database import SessionLocal
+
+# Seconds between rank length checks
+TODO_RANK_REBALANCE_INTERVAL = int(os.getenv("TODO_RANK_REBALANCE_INTERVAL", "3600"))
+
+_stop = threading.Event()
+_thread = None
+
+
+def rebalance_if_needed() -> int:
+    """Rebalance rank keys if needed; returns the number of todos rewritten."""
+    db = SessionLocal()
+    try:
+        if not crud.ranks_need_rebalance(db):
+            return 0
+        count = crud.rebalance_ranks(db)
+        print(f"Rebalanced rank keys for {count} todos")
+        return count
+    finally:
+        db.close()
+
+
+def _run():
+    while True:
+        try:
+            rebalance_if_needed()
+        except Exception as e:
+            print(f"Error rebalancing todo ranks: {e}")
+        if _stop.wait(TODO_RANK_REBALANCE_INTERVAL):
+            return
+
+
+def start() -> None:
+    """Start the rebalance thread (runs a first check immediately)."""
+    global _thread
+    if _thread is not None and _thread.is_alive():
+        return
+    _stop.clear()
+    _thread = threading.Thread(target=_run, name="todo-rank-rebalancer", daemon=True)
+    _thread.start()
+
+
+def stop() -> None:
+    _stop.set()
@@ -0,0 +1,204 @@
+"""
+Background refresh scheduler with a stale-while-revalidate widget cache.
+
+Each upstream source (GitHub, Jira, Calendar, Gmail) is refreshed on its own
+interval by a background task and the latest result is kept in memory.
+Routers serve that result immediately along with freshness metadata, so a
+request never waits on GitHub/Jira/Google latency once the first refresh has
+completed. A failed refresh keeps serving the previous value and records the
+error. Concurrent on-demand refreshes of the same source share one upstream
+call.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+import metrics
+from services import github_service, jira_service, calendar_service, gmail_service
+
+# Refresh intervals per source, in seconds
+REFRESH_INTERVAL_GITHUB = int(os.getenv("REFRESH_INTERVAL_GITHUB", "120"))
+REFRESH_INTERVAL_JIRA = int(os.getenv("REFRESH_INTERVAL_JIRA", "120"))
+REFRESH_INTERVAL_CALENDAR = int(os.getenv("REFRESH_INTERVAL_CALENDAR", "300"))
+REFRESH_INTERVAL_GMAIL = int(os.getenv("REFRESH_INTERVAL_GMAIL", "60"))
+
+
+class SourceEntry:
+    """Latest result of one source plus its freshness metadata."""
+
+    def __init__(self, name: str, fetch: Callable[[], Any], interval: int):
+        self.name = name
+        self.fetch = fetch
+        self.interval = interval
+        self.value: Any = None
+        self.updated_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[float] = None
+        self.last_duration_ms: Optional[float] = None
+        # Requests served from the cached value vs. ones that waited for upstream
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+        self._inflight: Optional[asyncio.Task] = None
+
+    @property
+    def has_value(self) -> bool:
+        return self.updated_at is not None
+
+    @property
+    def age_seconds(self) -> Optional[float]:
+        if self.updated_at is None:
+            return None
+        return round(time.time() - self.updated_at, 3)
+
+    def freshness_headers(self) -> Dict[str, str]:
+        """Response headers describing how fresh the served value is."""
+        headers = {"X-Data-Refresh-Interval": str(self.interval)}
+        if self.updated_at is not None:
+            headers["X-Data-Age"] = f"{self.age_seconds:.3f}"
+            headers["X-Data-Updated-At"] = f"{self.updated_at:.3f}"
+        if self.last_error:
+            headers["X-Data-Last-Error"] = self.last_error.replace("\n", " ")[:200]
+        return headers
+
+
+class RefreshScheduler:
+    """Refreshes registered sources in the background and serves cached results."""
+
+    def __init__(self):
+        self._sources: Dict[str, SourceEntry] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._change_listeners: List[Callable[[str, SourceEntry], None]] = []
+
+    def register(self, name: str, fetch: Callable[[], Any], interval: int) -> None:
+        self._sources[name] = SourceEntry(name, fetch, interval)
+
+    def entry(self, name: str) -> SourceEntry:
+        return self._sources[name]
+
+    @property
+    def names(self):
+        return list(self._sources)
+
+    def add_change_listener(self, listener: Callable[[str, SourceEntry], None]) -> None:
+        """Call ``listener(name, entry)`` on the event loop whenever a refresh changes a value."""
+        self._change_listeners.append(listener)
+
+    def _notify_changed(self, entry: SourceEntry) -> None:
+        for listener in self._change_listeners:
+            try:
+                listener(entry.name, entry)
+            except Exception as e:
+                print(f"Scheduler: change listener failed for {entry.name}: {e}")
+
+    async def _do_refresh(self, entry: SourceEntry) -> None:
+        start = time.perf_counter()
+        try:
+            value = await run_in_threadpool(entry.fetch)
+            changed = not entry.has_value or value != entry.value
+            entry.value = value
+            entry.updated_at = time.time()
+            entry.last_error = None
+            entry.last_error_at = None
+            if changed:
+                self._notify_changed(entry)
+        except Exception as e:
+            # Keep serving the previous value; just record the failure
+            print(f"Scheduler: refresh of {entry.name} failed: {e}")
+            entry.failures += 1
+            entry.last_error = str(e) or e.__class__.__name__
+            entry.last_error_at = time.time()
+        finally:
+            entry.last_duration_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    async def refresh(self, name: str) -> SourceEntry:
+        """Refresh a source now, joining an already running refresh if there is one."""
+        entry = self._sources[name]
+        if entry._inflight is None or entry._inflight.done():
+            entry._inflight = asyncio.create_task(self._do_refresh(entry))
+        # Shield so a cancelled request does not cancel the shared refresh
+        await asyncio.shield(entry._inflight)
+        return entry
+
+    async def get(self, name: str, force_refresh: bool = False) -> SourceEntry:
+        """Return the cached entry, only waiting for upstream on first use or when forced."""
+        entry = self._sources[name]
+        if force_refresh or not entry.has_value:
+            entry.misses += 1
+            await self.refresh(name)
+        else:
+            entry.hits += 1
+        return entry
+
+    def stats(self) -> Dict[str, dict]:
+        """Per-source cache and refresh counters."""
+        stats = {}
+        for name, entry in self._sources.items():
+            total = entry.hits + entry.misses
+            stats[name] = {
+                "hits": entry.hits,
+                "misses": entry.misses,
+                "hit_ratio": round(entry.hits / total, 3) if total else 0.0,
+                "refresh_failures": entry.failures,
+                "age_seconds": entry.age_seconds,
+                "last_duration_ms": entry.last_duration_ms,
+            }
+        return stats
+
+    async def _run_loop(self, name: str) -> None:
+        entry = self._sources[name]
+        while True:
+            await self.refresh(name)
+            await asyncio.sleep(entry.interval)
+
+    def start(self) -> None:
+        """Start one background refresh loop per source (call from the running event loop)."""
+        for name in self._sources:
+            if name not in self._tasks:
+                self._tasks[name] = asyncio.create_task(self._run_loop(name))
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        self._tasks.clear()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+scheduler = RefreshScheduler()
+scheduler.register("github_prs", github_service.get_review_requested_prs, REFRESH_INTERVAL_GITHUB)
+scheduler.register("my_prs", github_service.get_my_prs, REFRESH_INTERVAL_GITHUB)
+scheduler.register("jira_tasks", jira_service.get_my_tasks, REFRESH_INTERVAL_JIRA)
+scheduler.register("calendar_events", calendar_service.get_todays_events, REFRESH_INTERVAL_CALENDAR)
+scheduler.register("gmail_unread", gmail_service.get_unread_count, REFRESH_INTERVAL_GMAIL)
+scheduler.register("gmail_counts", gmail_service.get_label_counts, REFRESH_INTERVAL_GMAIL)
+
+
+def _stat_samples(field: str):
+    return [({"source": name}, stats[field]) for name, stats in scheduler.stats().items() if stats[field] is not None]
+
+
+metrics.register_callback(
+    "widget_cache_hits_total", "Widget requests served from the scheduler's cached value.", "counter",
+    lambda: _stat_samples("hits"),
+)
+metrics.register_callback(
+    "widget_cache_misses_total", "Widget requests that waited for an upstream refresh.", "counter",
+    lambda: _stat_samples("misses"),
+)
+metrics.register_callback(
+    "widget_cache_hit_ratio", "Share of widget requests served from the cached value.", "gauge",
+    lambda: _stat_samples("hit_ratio"),
+)
+metrics.register_callback(
+    "widget_refresh_failures_total", "Background refreshes that failed (the previous value is kept).", "counter",
+    lambda: _stat_samples("refresh_failures"),
+)
+metrics.register_callback(
+    "widget_data_age_seconds", "Age of the cached value per source.", "gauge",
+    lambda: _stat_samples("age_seconds"),
+)
@@ -0,0 +1,41 @@
+"""
+Shared fixtures. Run from the backend directory: python -m pytest
+
+Tests use their own in-memory SQLite engine; DATABASE_URL is pointed at SQLite
+before the app modules are imported so database.py never needs PostgreSQL.
+"""
+import os
+import sys
+
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import crud
+import models
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    models.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def rank_mode(monkeypatch):
+    monkeypatch.setattr(crud, "TODO_ORDERING", "rank")
+
+
+@pytest.fixture
+def position_mode(monkeypatch):
+    monkeypatch.setattr(crud, "TODO_ORDERING", "position")
@@ -0,0 +1,82 @@
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from etag_middleware import ETagMiddleware, _etag_matches, make_etag
+
+BODY = {"items": ["x" * 50] * 100}
+
+
+def _client():
+    app = FastAPI()
+
+    @app.get("/api/v1/items")
+    def items():
+        return BODY
+
+    @app.get("/api/v1/missing")
+    def missing():
+        return PlainTextResponse("nope", status_code=404)
+
+    @app.get("/api/v1/stream")
+    def stream():
+        return StreamingResponse(iter([b"data: 1\n\n"]), media_type="text/event-stream")
+
+    @app.get("/other")
+    def other():
+        return {"ok": True}
+
+    app.add_middleware(ETagMiddleware)
+    app.add_middleware(GZipMiddleware, minimum_size=100)
+    return TestClient(app)
+
+
+def test_etag_is_weak_and_shared_by_gzip_and_identity():
+    client = _client()
+    gzipped = client.get("/api/v1/items", headers={"Accept-Encoding": "gzip"})
+    identity = client.get("/api/v1/items", headers={"Accept-Encoding": "identity"})
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert gzipped.headers["etag"].startswith('W/"')
+    assert gzipped.headers["etag"] == identity.headers["etag"]
+    assert gzipped.headers["cache-control"] == "private, no-cache"
+
+
+def test_matching_if_none_match_returns_304():
+    client = _client()
+    etag = client.get("/api/v1/items").headers["etag"]
+
+    response = client.get("/api/v1/items", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_stale_if_none_match_returns_body():
+    client = _client()
+
+    response = client.get("/api/v1/items", headers={"If-None-Match": 'W/"stale"'})
+
+    assert response.status_code == 200
+    assert response.json() == BODY
+
+
+def test_errors_streams_and_other_paths_get_no_etag():
+    client = _client()
+
+    assert "etag" not in client.get("/api/v1/missing").headers
+    assert "etag" not in client.get("/api/v1/stream").headers
+    assert "etag" not in client.get("/other").headers
+
+
+def test_if_none_match_comparison_is_weak():
+    etag = make_etag(b"{}")
+
+    assert _etag_matches(etag, etag)
+    assert _etag_matches(etag.removeprefix("W/"), etag)
+    assert _etag_matches(f'"other", {etag}', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"other"', etag)
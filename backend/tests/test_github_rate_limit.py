@@ -0,0 +1,141 @@
+import pytest
+import requests
+
+from services import github_rate_limit
+from services.github_rate_limit import RateLimited, RateLimiter, is_throttled, resource_for
+
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(github_rate_limit, "time", clock)
+    return clock
+
+
+def _response(status=200, limit=None, remaining=None, reset=None, text="", **headers):
+    response = requests.Response()
+    response.status_code = status
+    response._content = text.encode()
+    for name, value in (("X-RateLimit-Limit", limit), ("X-RateLimit-Remaining", remaining),
+                        ("X-RateLimit-Reset", reset)):
+        if value is not None:
+            response.headers[name] = str(int(value))
+    response.headers.update(headers)
+    return response
+
+
+def test_resource_for():
+    assert resource_for("https://api.github.com/search/issues") == "search"
+    assert resource_for("https://api.github.com/graphql") == "graphql"
+    assert resource_for("https://api.github.com/repos/o/r/pulls/1") == "core"
+
+
+def test_is_throttled_tells_rate_limits_from_permission_errors():
+    assert is_throttled(_response(429))
+    assert is_throttled(_response(403, remaining=0))
+    assert is_throttled(_response(403, text="You have exceeded a secondary rate limit"))
+    assert not is_throttled(_response(403, remaining=10, text="Resource not accessible"))
+    assert not is_throttled(_response(200, remaining=0))
+
+
+def test_plenty_of_budget_is_not_delayed(clock):
+    limiter = RateLimiter()
+    limiter.record("search", _response(limit=30, remaining=25, reset=clock.now + 60))
+
+    limiter.acquire("search")
+
+    assert clock.slept == []
+
+
+def test_low_budget_spaces_calls_until_reset(clock):
+    limiter = RateLimiter()
+    limiter.record("search", _response(limit=30, remaining=4, reset=clock.now + 8))
+
+    for _ in range(3):
+        limiter.acquire("search")
+
+    # 4 calls left for 8 seconds: one every ~2s after the first
+    assert clock.slept == [pytest.approx(2.0), pytest.approx(2.0)]
+    search = next(s for s in limiter.snapshot() if s["resource"] == "search")
+    assert search["delayed"] == 2
+
+
+def test_exhausted_budget_defers_past_max_wait(clock, monkeypatch):
+    monkeypatch.setattr(github_rate_limit, "GITHUB_RATE_LIMIT_MAX_WAIT", 10)
+    limiter = RateLimiter()
+    limiter.record("core", _response(limit=5000, remaining=0, reset=clock.now + 600))
+
+    with pytest.raises(RateLimited) as excinfo:
+        limiter.acquire("core")
+
+    assert excinfo.value.resource == "core"
+    assert excinfo.value.retry_at == pytest.approx(clock.now + 600)
+    assert clock.slept == []
+
+
+def test_exhausted_budget_waits_when_reset_is_near(clock):
+    limiter = RateLimiter()
+    limiter.record("core", _response(limit=5000, remaining=0, reset=clock.now + 3))
+
+    limiter.acquire("core")
+
+    assert clock.slept == [pytest.approx(3.0)]
+
+
+def test_retry_after_blocks_the_resource(clock):
+    limiter = RateLimiter()
+    limiter.record("search", _response(429, **{"Retry-After": "120"}))
+
+    with pytest.raises(RateLimited):
+        limiter.acquire("search")
+    limiter.acquire("core")
+
+    clock.now += 121
+    limiter.acquire("search")
+    search = next(s for s in limiter.snapshot() if s["resource"] == "search")
+    assert search["throttled"] == 1
+    assert search["deferred"] == 1
+
+
+def test_secondary_limit_without_retry_after_backs_off(clock):
+    limiter = RateLimiter()
+    limiter.record("core", _response(403, text="secondary rate limit"))
+
+    with pytest.raises(RateLimited) as excinfo:
+        limiter.acquire("core")
+
+    assert excinfo.value.retry_at == pytest.approx(clock.now + github_rate_limit.SECONDARY_LIMIT_BACKOFF)
+
+
+def test_window_rollover_clears_the_budget(clock):
+    limiter = RateLimiter()
+    limiter.record("search", _response(limit=30, remaining=0, reset=clock.now + 5))
+
+    clock.now += 6
+    limiter.acquire("search")
+
+    assert clock.slept == []
+
+
+def test_header_resource_overrides_url_resource(clock):
+    limiter = RateLimiter()
+    limiter.record("search", _response(limit=10, remaining=9, reset=clock.now + 60,
+                                       **{"X-RateLimit-Resource": "code_search"}))
+
+    snapshot = {s["resource"]: s for s in limiter.snapshot()}
+
+    assert snapshot["code_search"]["remaining"] == 9
+    assert snapshot["search"]["remaining"] is None
@@ -0,0 +1,91 @@
+import pytest
+import requests
+
+from services import http_client
+from services.http_cache import ConditionalCache, make_key
+
+URL = "https://example.com/api"
+
+
+def _response(status=200, body=b"", **headers):
+    response = requests.Response()
+    response.status_code = status
+    response._content = body
+    response.headers.update(headers)
+    return response
+
+
+def test_make_key_ignores_param_order():
+    assert make_key(URL, {"a": 1, "b": 2}) == make_key(URL, {"b": "2", "a": "1"})
+    assert make_key(URL, {"a": 1}) != make_key(URL, {"a": 2})
+
+
+def test_304_serves_the_cached_response():
+    cache = ConditionalCache()
+    key = make_key(URL)
+    fresh = cache.resolve(key, _response(body=b'{"v": 1}', ETag='"x"', **{"Last-Modified": "Mon"}))
+
+    assert cache.conditional_headers(key) == {"If-None-Match": '"x"', "If-Modified-Since": "Mon"}
+    assert cache.resolve(key, _response(304)) is fresh
+    assert cache.stats()["hits"] == 1
+
+
+def test_responses_without_validators_are_not_cached():
+    cache = ConditionalCache()
+    key = make_key(URL)
+    cache.resolve(key, _response(body=b"{}"))
+    cache.resolve(key, _response(500, ETag='"x"'))
+
+    assert cache.conditional_headers(key) == {}
+    assert cache.stats()["entries"] == 0
+
+
+def test_unmatched_304_is_reported_as_none():
+    cache = ConditionalCache()
+
+    assert cache.resolve(make_key(URL), _response(304)) is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ConditionalCache(max_entries=2)
+    for name in ("a", "b"):
+        cache.resolve(make_key(f"{URL}/{name}"), _response(ETag=f'"{name}"'))
+    cache.resolve(make_key(f"{URL}/a"), _response(304))
+    cache.resolve(make_key(f"{URL}/c"), _response(ETag='"c"'))
+
+    assert cache.conditional_headers(make_key(f"{URL}/b")) == {}
+    assert cache.conditional_headers(make_key(f"{URL}/a")) == {"If-None-Match": '"a"'}
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    calls = []
+    monkeypatch.setattr(http_client, "response_cache", ConditionalCache())
+
+    def request(method, url, headers=None, **kwargs):
+        calls.append(dict(headers or {}))
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            return _response(304)
+        return _response(body=b'{"v": 1}', ETag='"v1"')
+
+    monkeypatch.setattr(http_client, "request", request)
+    return calls
+
+
+def test_conditional_get_revalidates(upstream):
+    first = http_client.get(URL, conditional=True)
+    second = http_client.get(URL, conditional=True)
+
+    assert second is first
+    assert upstream == [{}, {"If-None-Match": '"v1"'}]
+
+
+def test_unexpected_304_is_retried_without_validators(upstream, monkeypatch):
+    # Validators were sent, but the entry is gone by the time the 304 arrives
+    monkeypatch.setattr(http_client.response_cache, "conditional_headers", lambda key: {"If-None-Match": '"v1"'})
+
+    response = http_client.get(URL, conditional=True, headers={"Accept": "application/json"})
+
+    assert response.json() == {"v": 1}
+    assert upstream == [{"Accept": "application/json", "If-None-Match": '"v1"'}, {"Accept": "application/json"}]
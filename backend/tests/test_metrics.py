@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+import metrics
+
+
+def _count(histogram, **labels):
+    counts, _ = histogram._values.get(histogram._key(labels), ([0], [0.0]))
+    return sum(counts)
+
+
+def test_failed_statement_does_not_skew_later_timings():
+    engine = create_engine("sqlite://")
+    metrics.instrument_engine(engine)
+    before = _count(metrics.db_query_duration, operation="SELECT")
+
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.execute(text("SELECT * FROM missing_table"))
+        conn.execute(text("SELECT 1"))
+        assert "metrics_query_start" not in conn.info
+
+    assert _count(metrics.db_query_duration, operation="SELECT") == before + 1
+
+
+def test_render_includes_histogram_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test histogram.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(5.0, route="/a")
+
+    lines = histogram.render()
+
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'test_seconds_count{route="/a"} 2' in lines
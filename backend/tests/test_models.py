@@ -0,0 +1,14 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
+import models
+
+
+def test_rank_uses_binary_collation_on_postgresql():
+    ddl = str(CreateTable(models.Todo.__table__).compile(dialect=postgresql.dialect()))
+    assert 'rank VARCHAR COLLATE "C"' in ddl
+
+
+def test_rank_keeps_default_collation_on_sqlite():
+    ddl = str(CreateTable(models.Todo.__table__).compile(dialect=sqlite.dialect()))
+    assert "rank VARCHAR," in ddl
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from ranking import evenly_spaced_ranks, rank_between
+
+
+@pytest.mark.parametrize("before,after", [
+    (None, None), ("i", None), (None, "i"), ("a", "b"), ("a", "a1"), ("az", "b"),
+    ("zz", None), (None, "01"), ("i", "ii"), ("abc", "abd"),
+])
+def test_rank_between_sorts_strictly_between(before, after):
+    key = rank_between(before, after)
+
+    assert before is None or before < key
+    assert after is None or key < after
+    assert not key.endswith("0")
+
+
+def test_rank_between_rejects_unordered_bounds():
+    with pytest.raises(ValueError):
+        rank_between("b", "a")
+    with pytest.raises(ValueError):
+        rank_between("a", "a")
+
+
+def test_appends_step_instead_of_halving():
+    keys = [rank_between(None, None)]
+    for _ in range(100):
+        keys.append(rank_between(keys[-1], None))
+
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    assert max(len(key) for key in keys) <= 7
+
+
+def test_repeated_inserts_at_one_spot_stay_ordered():
+    random.seed(0)
+    keys = ["i"]
+    for _ in range(300):
+        index = random.randrange(len(keys) + 1)
+        before = keys[index - 1] if index else None
+        after = keys[index] if index < len(keys) else None
+        keys.insert(index, rank_between(before, after))
+
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 35, 36, 1000])
+def test_evenly_spaced_ranks(count):
+    ranks = evenly_spaced_ranks(count)
+
+    assert len(ranks) == count
+    assert ranks == sorted(ranks)
+    assert len(set(ranks)) == count
+    assert all(rank and not rank.endswith("0") for rank in ranks)
+    # Room is left before the first and after the last key
+    if ranks:
+        rank_between(None, ranks[0])
+        rank_between(ranks[-1], None)
@@ -0,0 +1,166 @@
+import pytest
+
+import crud
+import schemas
+
+
+def _create(db, *titles):
+    return [crud.create_todo(db, schemas.TodoCreate(title=title)).id for title in titles]
+
+
+def _ids(db):
+    return [todo.id for todo in crud.get_todos(db, limit=1000)]
+
+
+def test_reorder_subset_keeps_unlisted_todos_in_place(db, rank_mode):
+    ids = _create(db, "a", "b", "c", "d", "e")
+
+    crud.reorder_todos(db, [ids[3], ids[1]])
+
+    assert _ids(db) == [ids[0], ids[3], ids[2], ids[1], ids[4]]
+
+
+def test_reorder_full_list_in_rank_mode(db, rank_mode):
+    ids = _create(db, "a", "b", "c")
+
+    todos = crud.reorder_todos(db, ids[::-1])
+
+    assert [todo.id for todo in todos] == ids[::-1]
+    assert _ids(db) == ids[::-1]
+
+
+def test_reorder_ignores_unknown_ids(db, rank_mode):
+    ids = _create(db, "a", "b")
+
+    crud.reorder_todos(db, [ids[1], 999, ids[0]])
+
+    assert _ids(db) == [ids[1], ids[0]]
+
+
+def test_reorder_spreads_shared_ranks_first(db, rank_mode):
+    ids = _create(db, "a", "b", "c")
+    for todo_id in ids[:2]:
+        db.get(crud.models.Todo, todo_id).rank = "i"
+    db.commit()
+
+    crud.reorder_todos(db, [ids[1], ids[0]])
+
+    assert _ids(db) == [ids[1], ids[0], ids[2]]
+
+
+def test_reorder_in_position_mode(db, position_mode):
+    ids = _create(db, "a", "b", "c")
+
+    crud.reorder_todos(db, [ids[2], ids[0], ids[1]])
+
+    assert _ids(db) == [ids[2], ids[0], ids[1]]
+
+
+def test_appended_rank_keys_stay_short(db, rank_mode, monkeypatch):
+    monkeypatch.setattr(crud, "TODO_RANK_MAX_LENGTH", 3)
+
+    ids = _create(db, *[f"todo {i}" for i in range(200)])
+
+    ranks = [todo.rank for todo in crud.get_todos(db, limit=1000)]
+    assert max(len(rank) for rank in ranks) <= 3
+    assert _ids(db) == ids
+
+
+def test_move_todo_in_rank_mode_writes_only_the_moved_todo(db, rank_mode):
+    ids = _create(db, "a", "b", "c", "d")
+    before = {todo.id: todo.rank for todo in crud.get_todos(db)}
+
+    crud.move_todo(db, ids[3], after_id=ids[0])
+    assert _ids(db) == [ids[0], ids[3], ids[1], ids[2]]
+    crud.move_todo(db, ids[0], before_id=ids[2])
+    assert _ids(db) == [ids[3], ids[1], ids[0], ids[2]]
+    crud.move_todo(db, ids[3])
+    assert _ids(db) == [ids[1], ids[0], ids[2], ids[3]]
+
+    after = {todo.id: todo.rank for todo in crud.get_todos(db)}
+    assert after[ids[1]] == before[ids[1]]
+    assert after[ids[2]] == before[ids[2]]
+
+
+def test_move_todo_rejects_bad_neighbours(db, rank_mode):
+    ids = _create(db, "a", "b", "c")
+
+    with pytest.raises(ValueError):
+        crud.move_todo(db, ids[0], after_id=ids[0])
+    with pytest.raises(ValueError):
+        crud.move_todo(db, ids[0], after_id=999)
+    with pytest.raises(ValueError):
+        crud.move_todo(db, ids[0], after_id=ids[2], before_id=ids[1])
+    assert crud.move_todo(db, 999) is None
+
+
+def test_move_todo_in_position_mode(db, position_mode):
+    ids = _create(db, "a", "b", "c")
+
+    moved = crud.move_todo(db, ids[2], before_id=ids[0])
+
+    assert moved.id == ids[2]
+    assert _ids(db) == [ids[2], ids[0], ids[1]]
+
+
+def test_todo_changes_since_version(db, position_mode):
+    ids = _create(db, "a", "b", "c")
+    version = crud.current_version(db)
+
+    crud.update_todo(db, ids[0], schemas.TodoUpdate(title="a2", completed=True))
+    crud.delete_todo(db, ids[1])
+    changes = crud.get_todo_changes(db, version)
+
+    assert changes.version == crud.current_version(db) > version
+    assert [todo.id for todo in changes.todos] == [ids[0]]
+    assert changes.todos[0].title == "a2"
+    assert changes.deleted == [ids[1]]
+    assert crud.get_todo_changes(db, changes.version).todos == []
+    assert crud.get_todo_changes(db, changes.version).deleted == []
+
+
+def test_todo_changes_from_zero_list_every_live_todo(db, position_mode):
+    ids = _create(db, "a", "b")
+    crud.delete_todo(db, ids[0])
+
+    changes = crud.get_todo_changes(db, 0)
+
+    assert [todo.id for todo in changes.todos] == [ids[1]]
+    assert changes.deleted == [ids[0]]
+
+
+def test_update_with_stale_version_conflicts(db, position_mode):
+    todo_id = _create(db, "a")[0]
+    version = db.get(crud.models.Todo, todo_id).version
+    crud.update_todo(db, todo_id, schemas.TodoUpdate(title="b", version=version))
+
+    with pytest.raises(crud.TodoConflict):
+        crud.update_todo(db, todo_id, schemas.TodoUpdate(title="c", version=version))
+    assert db.get(crud.models.Todo, todo_id).title == "b"
+
+
+@pytest.mark.parametrize("mode", ["position", "rank"])
+def test_keyset_pages_cover_the_list_once(db, monkeypatch, mode):
+    monkeypatch.setattr(crud, "TODO_ORDERING", mode)
+    ids = _create(db, *[f"todo {i}" for i in range(7)])
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = crud.get_todos_page(db, limit=3, cursor=cursor)
+        seen.extend(todo.id for todo in page)
+        if cursor is None:
+            break
+
+    assert seen == ids
+
+
+def test_cursor_from_other_ordering_is_rejected(db, monkeypatch):
+    monkeypatch.setattr(crud, "TODO_ORDERING", "position")
+    _create(db, "a", "b")
+    _, cursor = crud.get_todos_page(db, limit=1)
+    monkeypatch.setattr(crud, "TODO_ORDERING", "rank")
+
+    with pytest.raises(ValueError):
+        crud.decode_cursor(cursor)
+    with pytest.raises(ValueError):
+        crud.decode_cursor("not a cursor")
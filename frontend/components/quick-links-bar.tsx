@@ -4,6 +4,7 @@ import * as React from "react"
 import { Mail, SquareKanban } from "lucide-react"
 import { Button } from "@/components/ui/button"
 import { Badge } from "@/components/ui/badge"
+import { subscribeServerEvents } from "@/lib/server-events"
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8002"
 
@@ -28,9 +29,8 @@ export function QuickLinksBar() {
 
         fetchUnreadCount()
 
-        // Auto-refresh every 5 minutes
-        const interval = setInterval(fetchUnreadCount, 5 * 60 * 1000)
-        return () => clearInterval(interval)
+        // Refetch when the server reports a new unread count
+        return subscribeServerEvents("gmail_unread", fetchUnreadCount)
     }, [])
 
     const openGmail = () => {
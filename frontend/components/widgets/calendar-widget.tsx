@@ -6,6 +6,7 @@ import { Calendar, MapPin, ExternalLink } from "lucide-react"
 import { Button } from "@/components/ui/button"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import { CalendarEvent } from "@/types"
+import { subscribeServerEvents } from "@/lib/server-events"
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8002"
 
@@ -71,9 +72,8 @@ export function CalendarWidget() {
     }
     fetchEvents()
 
-    // Auto-refresh every 5 minutes
-    const interval = setInterval(fetchEvents, 5 * 60 * 1000)
-    return () => clearInterval(interval)
+    // Refetch when the server reports new calendar data
+    return subscribeServerEvents("calendar_events", fetchEvents)
   }, [])
 
   const formatTime = (isoString: string) => {
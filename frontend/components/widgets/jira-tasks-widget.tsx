@@ -7,6 +7,7 @@ import { Button } from "@/components/ui/button"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import { Badge } from "@/components/ui/badge"
 import { JiraIssue } from "@/types"
+import { subscribeServerEvents } from "@/lib/server-events"
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8002"
 
@@ -31,9 +32,8 @@ export function JiraTasksWidget() {
         }
         fetchTasks()
 
-        // Auto-refresh every 5 minutes
-        const interval = setInterval(fetchTasks, 5 * 60 * 1000)
-        return () => clearInterval(interval)
+        // Refetch when the server reports new Jira data
+        return subscribeServerEvents("jira_tasks", fetchTasks)
     }, [])
 
     const getStatusColor = (status: string) => {
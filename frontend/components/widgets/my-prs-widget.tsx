@@ -7,6 +7,7 @@ import { Button } from "@/components/ui/button"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import { Badge } from "@/components/ui/badge"
 import { GithubPR } from "@/types"
+import { subscribeServerEvents } from "@/lib/server-events"
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8002"
 
@@ -117,9 +118,8 @@ export function MyPrsWidget() {
         }
         fetchPrs()
 
-        // Auto-refresh every 5 minutes
-        const interval = setInterval(fetchPrs, 5 * 60 * 1000)
-        return () => clearInterval(interval)
+        // Refetch when the server reports new PR data
+        return subscribeServerEvents("my_prs", fetchPrs)
     }, [])
 
     return (
@@ -7,7 +7,8 @@ import { Input } from "@/components/ui/input"
 import { Button } from "@/components/ui/button"
 import { Checkbox } from "@/components/ui/checkbox"
 import { ScrollArea } from "@/components/ui/scroll-area"
-import { Todo } from "@/types"
+import { Todo, TodoChanges } from "@/types"
+import { subscribeServerEvents } from "@/lib/server-events"
 
 // DnD Kit imports
 import {
@@ -30,6 +31,16 @@ import { CSS } from "@dnd-kit/utilities"
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8002"
 
+// Apply a ?since= delta to the current list, keeping list order (rank when set, else order)
+function mergeTodoChanges(todos: Todo[], changes: TodoChanges): Todo[] {
+    const removed = new Set([...changes.deleted, ...changes.todos.map((t) => t.id)])
+    const merged = [...todos.filter((t) => !removed.has(t.id)), ...changes.todos]
+    return merged.sort((a, b) => {
+        if (a.rank && b.rank && a.rank !== b.rank) return a.rank < b.rank ? -1 : 1
+        return a.order - b.order || a.id - b.id
+    })
+}
+
 // Sortable Todo Item Component
 function SortableTodoItem({
     todo,
@@ -187,11 +198,27 @@ export function TodoWidget() {
         })
     )
 
+    // Version of the last fetch; later fetches only transfer what changed since
+    const versionRef = React.useRef<number | null>(null)
+
     const fetchTodos = async () => {
         try {
+            if (versionRef.current !== null) {
+                const res = await fetch(`${API_URL}/api/v1/todos/?since=${versionRef.current}`)
+                if (res.ok) {
+                    const changes: TodoChanges = await res.json()
+                    versionRef.current = changes.version
+                    if (changes.todos.length || changes.deleted.length) {
+                        setTodos((current) => mergeTodoChanges(current, changes))
+                    }
+                    return
+                }
+            }
             const res = await fetch(`${API_URL}/api/v1/todos/`)
             if (res.ok) {
                 const data = await res.json()
+                const version = res.headers.get("X-Todos-Version")
+                versionRef.current = version ? Number(version) : null
                 setTodos(data)
             }
         } catch (error) {
@@ -203,6 +230,9 @@ export function TodoWidget() {
 
     React.useEffect(() => {
         fetchTodos()
+
+        // Pull only the changes when todos are modified (e.g. from another tab)
+        return subscribeServerEvents("todos", fetchTodos)
     }, [])
 
     const addTodo = async (e: React.FormEvent) => {
@@ -284,12 +314,15 @@ export function TodoWidget() {
             // Optimistic update
             setTodos(newTodos)
 
-            // Persist order to backend
+            // Persist the move to backend (only the moved todo changes)
             try {
-                await fetch(`${API_URL}/api/v1/todos/reorder`, {
+                await fetch(`${API_URL}/api/v1/todos/${active.id}/move`, {
                     method: "POST",
                     headers: { "Content-Type": "application/json" },
-                    body: JSON.stringify({ order: newTodos.map((t) => t.id) }),
+                    body: JSON.stringify({
+                        after: newTodos[newIndex - 1]?.id ?? null,
+                        before: newTodos[newIndex + 1]?.id ?? null,
+                    }),
                 })
             } catch (error) {
                 console.error("Failed to reorder todos", error)
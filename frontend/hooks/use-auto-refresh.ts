@@ -1,18 +1,22 @@
 "use client"
 
 import { useState, useEffect, useCallback } from "react"
+import { subscribeServerEvents } from "@/lib/server-events"
 
 const REFRESH_INTERVAL = 5 * 60 * 1000 // 5 minutes in milliseconds
 
 /**
- * Custom hook for auto-refreshing data at a fixed interval.
+ * Custom hook for auto-refreshing data at a fixed interval, or whenever the
+ * server pushes an update for `source` (see lib/server-events) when given.
  * @param fetchFn - The function to call to fetch data
- * @param dependencies - Array of dependencies (passed to useCallback)
+ * @param initialData - Data to show before the first fetch completes
+ * @param source - Server event name (e.g. "jira_tasks") to refetch on
  * @returns { data, loading, error, refetch, lastUpdated }
  */
 export function useAutoRefresh<T>(
     fetchFn: () => Promise<T>,
-    initialData: T
+    initialData: T,
+    source?: string
 ) {
     const [data, setData] = useState<T>(initialData)
     const [loading, setLoading] = useState(true)
@@ -36,11 +40,15 @@ export function useAutoRefresh<T>(
         // Initial fetch
         refetch()
 
+        if (source) {
+            return subscribeServerEvents(source, refetch)
+        }
+
         // Set up interval for auto-refresh
         const interval = setInterval(refetch, REFRESH_INTERVAL)
 
         return () => clearInterval(interval)
-    }, [refetch])
+    }, [refetch, source])
 
     return { data, loading, error, refetch, lastUpdated }
 }
@@ -0,0 +1,72 @@
+const API_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8002"
+
+// Polling interval used only while the event stream is unavailable
+const FALLBACK_INTERVAL = 5 * 60 * 1000 // 5 minutes in milliseconds
+
+type Listener = () => void
+
+const listeners = new Map<string, Set<Listener>>()
+let source: EventSource | null = null
+let fallbackTimer: ReturnType<typeof setInterval> | null = null
+
+function notify(name: string) {
+    listeners.get(name)?.forEach((listener) => listener())
+}
+
+function notifyAll() {
+    listeners.forEach((set) => set.forEach((listener) => listener()))
+}
+
+function setFallbackPolling(enabled: boolean) {
+    if (enabled && !fallbackTimer) {
+        fallbackTimer = setInterval(notifyAll, FALLBACK_INTERVAL)
+    } else if (!enabled && fallbackTimer) {
+        clearInterval(fallbackTimer)
+        fallbackTimer = null
+    }
+}
+
+function addSourceListener(name: string) {
+    source?.addEventListener(name, () => notify(name))
+}
+
+function connect() {
+    if (source) return
+    if (typeof EventSource === "undefined") {
+        setFallbackPolling(true)
+        return
+    }
+    // One shared connection per page; EventSource reconnects on its own and
+    // sends Last-Event-ID so missed events are replayed
+    source = new EventSource(`${API_URL}/api/v1/events`)
+    source.onopen = () => setFallbackPolling(false)
+    source.onerror = () => setFallbackPolling(true)
+    // Events were missed beyond what the server buffers: refetch everything
+    source.addEventListener("resync", notifyAll)
+    listeners.forEach((_, name) => addSourceListener(name))
+}
+
+/**
+ * Call `listener` whenever the server reports that `name` changed
+ * (github_prs, my_prs, jira_tasks, calendar_events, gmail_unread, todos).
+ * Falls back to polling every 5 minutes while the stream is down.
+ * Returns an unsubscribe function.
+ */
+export function subscribeServerEvents(name: string, listener: Listener): () => void {
+    if (!listeners.has(name)) {
+        listeners.set(name, new Set())
+        addSourceListener(name)
+    }
+    listeners.get(name)!.add(listener)
+    connect()
+
+    return () => {
+        listeners.get(name)?.delete(listener)
+        const active = Array.from(listeners.values()).some((set) => set.size > 0)
+        if (!active) {
+            source?.close()
+            source = null
+            setFallbackPolling(false)
+        }
+    }
+}
@@ -5,6 +5,29 @@ export interface Todo {
     title: string;
     completed: boolean;
     order: number;
+    rank?: string | null;
+    version?: number | null;
+}
+
+export interface TodoChanges {
+    version: number;
+    todos: Todo[];
+    deleted: number[];
+}
+
+export interface TodoBatchOperation {
+    op: "create" | "update" | "delete" | "toggle";
+    id?: number;
+    title?: string;
+    completed?: boolean;
+}
+
+export interface TodoBatchResult {
+    op: string;
+    id: number | null;
+    ok: boolean;
+    todo: Todo | null;
+    error: string | null;
 }
 
 export interface GithubPR {
@@ -17,6 +40,7 @@ export interface GithubPR {
     labels: { name: string; color: string }[];
     mergeable?: boolean;
     mergeable_state?: string;
+    review_decision?: string;
 }
 
 export interface JiraIssue {
@@ -35,3 +59,24 @@ export interface CalendarEvent {
     location?: string;
     html_link: string;
 }
+
+export interface CalendarDay {
+    date: string;
+    events: CalendarEvent[];
+}
+
+export interface GmailLabelCount {
+    unread: number;
+    total: number;
+    estimated: boolean;
+}
+
+export interface GmailLabelCounts {
+    counts: Record<string, GmailLabelCount>;
+}
+
+export interface GmailArrival {
+    id: string;
+    thread_id: string;
+    seen_at: string;
+}